@@ -13,7 +13,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from app.model.base_model import Base
-from app.model import documents, chunks, user
+from app.model import documents, chunks, user, chats, messages, message_sources
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,33 @@
+"""add chat summary
+
+Revision ID: 0d57fc43a11c
+Revises: 8b3210682a04
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d57fc43a11c'
+down_revision: Union[str, Sequence[str], None] = '8b3210682a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("chats", sa.Column("summary", sa.Text(), nullable=True))
+    op.add_column(
+        "chats",
+        sa.Column("summarized_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("chats", "summarized_count")
+    op.drop_column("chats", "summary")
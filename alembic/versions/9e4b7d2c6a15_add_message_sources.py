@@ -0,0 +1,38 @@
+"""add message sources
+
+Revision ID: 9e4b7d2c6a15
+Revises: 5c2e8f1a9b37
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7d2c6a15'
+down_revision: Union[str, Sequence[str], None] = '5c2e8f1a9b37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message_sources",
+        sa.Column("message_id", sa.UUID(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("chunk_id", sa.UUID(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["message_id"], ["chat_messages.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("message_id", "rank"),
+    )
+    op.create_index("ix_message_sources_chunk_id", "message_sources", ["chunk_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_message_sources_chunk_id", table_name="message_sources")
+    op.drop_table("message_sources")
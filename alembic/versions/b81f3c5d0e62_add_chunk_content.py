@@ -0,0 +1,44 @@
+"""add chunk content and layout
+
+Revision ID: b81f3c5d0e62
+Revises: 9e4b7d2c6a15
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f3c5d0e62'
+down_revision: Union[str, Sequence[str], None] = '9e4b7d2c6a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("chunks", sa.Column("content", sa.Text(), nullable=True))
+    op.add_column("chunks", sa.Column("page", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("ordinal", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("char_start", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("char_end", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("token_count", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.create_index("ix_chunks_content_hash", "chunks", ["content_hash"])
+    op.create_index("ix_chunks_document_id_ordinal", "chunks", ["document_id", "ordinal"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_chunks_document_id_ordinal", table_name="chunks")
+    op.drop_index("ix_chunks_content_hash", table_name="chunks")
+    op.drop_column("chunks", "content_hash")
+    op.drop_column("chunks", "token_count")
+    op.drop_column("chunks", "char_end")
+    op.drop_column("chunks", "char_start")
+    op.drop_column("chunks", "ordinal")
+    op.drop_column("chunks", "page")
+    op.drop_column("chunks", "content")
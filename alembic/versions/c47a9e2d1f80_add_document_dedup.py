@@ -0,0 +1,46 @@
+"""add document content hash and reference counting
+
+Revision ID: c47a9e2d1f80
+Revises: b81f3c5d0e62
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a9e2d1f80'
+down_revision: Union[str, Sequence[str], None] = 'b81f3c5d0e62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("documents", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    op.add_column("documents", sa.Column("canonical_document_id", sa.UUID(), nullable=True))
+    op.add_column("documents", sa.Column("ref_count", sa.Integer(), server_default="1", nullable=False))
+    op.add_column("documents", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_foreign_key(
+        "fk_documents_canonical_document_id",
+        "documents",
+        "documents",
+        ["canonical_document_id"],
+        ["id"],
+    )
+    op.create_index("ix_documents_content_hash", "documents", ["content_hash"])
+    op.create_index("ix_documents_canonical_document_id", "documents", ["canonical_document_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_documents_canonical_document_id", table_name="documents")
+    op.drop_index("ix_documents_content_hash", table_name="documents")
+    op.drop_constraint("fk_documents_canonical_document_id", "documents", type_="foreignkey")
+    op.drop_column("documents", "deleted_at")
+    op.drop_column("documents", "ref_count")
+    op.drop_column("documents", "canonical_document_id")
+    op.drop_column("documents", "content_hash")
@@ -0,0 +1,28 @@
+"""add chunk near-duplicate group
+
+Revision ID: e93b4f6a2c18
+Revises: c47a9e2d1f80
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93b4f6a2c18'
+down_revision: Union[str, Sequence[str], None] = 'c47a9e2d1f80'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("chunks", sa.Column("dup_group", sa.UUID(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("chunks", "dup_group")
@@ -0,0 +1,34 @@
+"""unique content hash among live canonical documents
+
+Revision ID: f2a7c9d41b05
+Revises: e93b4f6a2c18
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c9d41b05'
+down_revision: Union[str, Sequence[str], None] = 'e93b4f6a2c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "uq_documents_canonical_content_hash",
+        "documents",
+        ["content_hash"],
+        unique=True,
+        postgresql_where=sa.text("canonical_document_id IS NULL AND processed_status <> 'FAILED'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_documents_canonical_content_hash", table_name="documents")
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_ready
 import os
 from dotenv import load_dotenv
 
@@ -13,7 +14,10 @@ celery_app = Celery(
 )
 
 # ✅ CORRECT
-celery_app.autodiscover_tasks(["app.tasks.document_processing_task"])
+celery_app.autodiscover_tasks([
+    "app.tasks.document_processing_task",
+    "app.tasks.chat_memory_task",
+])
 
 celery_app.conf.update(
     task_serializer="json",
@@ -22,3 +26,14 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
 )
+
+
+@worker_ready.connect
+def sweep_ingest_spool(**kwargs):
+    # Downloads orphaned by a killed or crashed worker
+    from app.vector_store.spool import sweep_spool
+    from app.storage.handoff import HANDOFF_DIR, HANDOFF_ORPHAN_AGE, HANDOFF_SUFFIX
+    sweep_spool()
+    # Uploads handed over by the API whose task never ran
+    if HANDOFF_DIR:
+        sweep_spool(HANDOFF_ORPHAN_AGE, directory=HANDOFF_DIR, suffix=HANDOFF_SUFFIX)
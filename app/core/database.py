@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -10,6 +12,40 @@ SQLALCHEMY_DATABASE_URL=os.getenv("DATABASE_URL")
 engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _async_database_url(url: str):
+    """
+    Maps DATABASE_URL onto the asyncpg driver. asyncpg takes `ssl` as a
+    connect argument instead of libpq's `sslmode` query parameter.
+    """
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+
+    connect_args = {"ssl": sslmode} if sslmode and sslmode != "disable" else {}
+    return parsed.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+_async_url, _async_connect_args = _async_database_url(
+    os.getenv("ASYNC_DATABASE_URL") or SQLALCHEMY_DATABASE_URL
+)
+
+async_engine = create_async_engine(
+    _async_url,
+    pool_pre_ping=True,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    connect_args=_async_connect_args,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 import app.model 
 
 def get_db():
@@ -18,4 +54,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,27 @@
+import os
+from functools import lru_cache
+import redis
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Caches share the Redis instance Celery uses unless a dedicated one is set.
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+SOCKET_TIMEOUT = float(os.getenv("CACHE_REDIS_TIMEOUT", "0.25"))
+
+
+@lru_cache(maxsize=1)
+def get_redis():
+    """
+    Returns the process-wide Redis client used by the caches,
+    or None when no Redis is configured (in-process tiers only).
+    """
+    if not CACHE_REDIS_URL:
+        return None
+
+    return redis.Redis.from_url(
+        CACHE_REDIS_URL,
+        socket_timeout=SOCKET_TIMEOUT,
+        socket_connect_timeout=SOCKET_TIMEOUT,
+        health_check_interval=30,
+    )
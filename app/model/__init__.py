@@ -2,4 +2,5 @@ from .user import User
 from .documents import Document
 from .chunks import Chunk
 from .chats import Chat
-from .messages import ChatMessage
\ No newline at end of file
+from .messages import ChatMessage
+from .message_sources import MessageSource
@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import String, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import String, Text, Integer, ForeignKey, DateTime, func
 
 from .base_model import Base
 
@@ -29,6 +29,20 @@ class Chat(Base):
         nullable=False,
     )
 
+    # Rolling summary of the oldest `summarized_count` messages,
+    # maintained by the update_chat_summary task
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summarized_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
+
+    # Chunks the last retrieval returned ([{page_content, metadata}]),
+    # reused by turns the retrieval router decides need no new context
+    last_context: Mapped[list[dict] | None] = mapped_column(JSONB, nullable=True)
+
    
     messages: Mapped[list["ChatMessage"]] = relationship(
         back_populates="chat",
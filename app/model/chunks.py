@@ -1,6 +1,6 @@
 import uuid
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Integer, String, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 from .base_model import Base
@@ -19,4 +19,22 @@ class Chunk(Base):
         ForeignKey("documents.id", ondelete="CASCADE"),
     )
 
+    # Source of truth for the chunk text and layout; Chroma and ES are
+    # indexes that can be rebuilt from these rows. Nullable for rows
+    # ingested before the columns existed.
+    content: Mapped[str | None] = mapped_column(Text, nullable=True)
+    page: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    ordinal: Mapped[int | None] = mapped_column(Integer, nullable=True)  # position in the document
+    char_start: Mapped[int | None] = mapped_column(Integer, nullable=True)  # offsets in the page text
+    char_end: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    token_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)  # sha256
+    # Near-duplicate of an earlier chunk of the same document (its id);
+    # None for the first chunk of a group
+    dup_group: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+
     document: Mapped["Document"] = relationship(back_populates="chunks")
+
+    __table_args__ = (
+        Index("ix_chunks_document_id_ordinal", "document_id", "ordinal"),
+    )
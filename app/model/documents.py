@@ -1,6 +1,6 @@
 import uuid
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, ForeignKey, Enum
+from sqlalchemy import String, ForeignKey, Enum, Integer, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from sqlalchemy import DateTime, func
@@ -36,8 +36,35 @@ class Document(Base):
         nullable=False,
     )
 
+    # sha256 of the uploaded bytes. An identical upload (any user) becomes a
+    # reference to the first document instead of being stored and ingested again.
+    content_hash: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
+    # Set on duplicates: the document whose chunks and vectors this one uses
+    canonical_document_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("documents.id"),
+        index=True,
+        nullable=True,
+    )
+    # On canonical documents: live documents using its chunks, itself included
+    ref_count: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+    # Canonical documents deleted by their owner while others still use them;
+    # hidden everywhere, purged with the last reference
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
     user: Mapped["User"] = relationship(back_populates="documents")
 
+    __table_args__ = (
+        # One live canonical document per content: concurrent first uploads
+        # of the same bytes cannot both be ingested
+        Index(
+            "uq_documents_canonical_content_hash",
+            "content_hash",
+            unique=True,
+            postgresql_where=text("canonical_document_id IS NULL AND processed_status <> 'FAILED'"),
+        ),
+    )
+
     chunks: Mapped[list["Chunk"]] = relationship(
         back_populates="document",
         cascade="all, delete-orphan",
@@ -0,0 +1,35 @@
+import uuid
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import ForeignKey, Integer, Float
+
+from .base_model import Base
+
+
+class MessageSource(Base):
+    """
+    A chunk that backed an assistant message, in the order it was given
+    to the LLM.
+    """
+    __tablename__ = "message_sources"
+
+    message_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("chat_messages.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    rank: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # No FK: the indexes may briefly serve chunks whose row is not committed
+    # (or already deleted), which must not fail saving the turn.
+    chunk_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        index=True,
+    )
+
+    score: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    message: Mapped["ChatMessage"] = relationship(
+        back_populates="sources"
+    )
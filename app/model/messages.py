@@ -34,3 +34,9 @@ class ChatMessage(Base):
     chat: Mapped["Chat"] = relationship(
         back_populates="messages"
     )
+
+    sources: Mapped[list["MessageSource"]] = relationship(
+        back_populates="message",
+        cascade="all, delete-orphan",
+        order_by="MessageSource.rank",
+    )
@@ -0,0 +1,84 @@
+import io
+import os
+from sqlalchemy import insert
+
+from app.repository.base_repository import BaseRepository
+from app.model.chunks import Chunk
+
+# "copy" (psycopg2 COPY FROM STDIN) or "values" (multi-row INSERT batches).
+# COPY falls back to VALUES on drivers other than psycopg2.
+CHUNK_INSERT_METHOD = os.getenv("CHUNK_INSERT_METHOD", "copy").lower()
+CHUNK_INSERT_BATCH = int(os.getenv("CHUNK_INSERT_BATCH", "1000"))
+
+CHUNK_COLUMNS = (
+    "id",
+    "document_id",
+    "content",
+    "page",
+    "ordinal",
+    "char_start",
+    "char_end",
+    "token_count",
+    "content_hash",
+    "dup_group",
+)
+
+
+def _csv_field(value) -> str:
+    # Unquoted empty field is NULL for COPY ... (FORMAT csv); everything
+    # else is quoted so empty strings stay empty strings. Inside quotes CSV
+    # has no escapes: backslashes, newlines and "\." lines are plain data.
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _clean(row: dict) -> dict:
+    # Postgres text cannot hold NUL bytes, which some PDF extractors emit
+    content = row.get("content")
+    if content and "\x00" in content:
+        row = {**row, "content": content.replace("\x00", "")}
+    return row
+
+
+class ChunkRepository(BaseRepository):
+    """
+    Bulk writer for chunk rows. Runs inside the caller's transaction;
+    committing is left to the caller.
+    """
+
+    def bulk_insert(self, rows: list[dict], method: str = CHUNK_INSERT_METHOD, batch_size: int = CHUNK_INSERT_BATCH) -> int:
+        rows = [_clean(r) for r in rows]
+        if not rows:
+            return 0
+
+        if method == "copy" and self.session.get_bind().dialect.driver == "psycopg2":
+            self._copy(rows)
+        else:
+            self._insert_values(rows, batch_size)
+        return len(rows)
+
+    def _insert_values(self, rows: list[dict], batch_size: int):
+        # Executed as multi-row INSERT ... VALUES pages ("insertmanyvalues"),
+        # with the statement compiled once instead of per batch
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            self.session.execute(
+                insert(Chunk),
+                [{column: row.get(column) for column in CHUNK_COLUMNS} for row in batch],
+            )
+
+    def _copy(self, rows: list[dict]):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(",".join(_csv_field(row.get(column)) for column in CHUNK_COLUMNS))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        # Same connection (and transaction) as the session
+        dbapi_connection = self.session.connection().connection.dbapi_connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {Chunk.__tablename__} ({', '.join(CHUNK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
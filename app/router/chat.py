@@ -1,126 +1,528 @@
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from langchain_core.documents import Document
 
-from app.core.database import get_db
+from app.core.database import get_async_db, AsyncSessionLocal
 from app.model.chats import Chat
+from app.model.documents import Document as DocumentModel
 from app.model.messages import ChatMessage
-from app.schemas.chat import ChatCreate, ChatResponse
+from app.model.message_sources import MessageSource
+from app.schemas.chat import ChatCreate, ChatResponse, SourceRef
 from app.utils.protected_route import get_current_user
-from rag.retrievers import build_retriever
-from rag.pipeline import run_rag
-from rag.title_generator import generate_chat_title
+from app.tasks.chat_memory_task import update_chat_summary
+from rag.engine import RetrievalEngine, get_retrieval_engine
+from rag.memory import MAX_HISTORY_MESSAGES, build_history
+from rag.pipeline import arun_rag, astream_rag
+from rag.query_condenser import acondense_query
+from rag.retrieval_router import needs_retrieval
+from rag.title_generator import agenerate_chat_title, provisional_title
+
+logger = logging.getLogger(__name__)
 
 chat_router = APIRouter(prefix="/chat", tags=["Chat"])
 
+SNIPPET_CHARS = 160
+
+# The event loop only keeps weak references to tasks
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _get_chat(db: AsyncSession, chat_id, user_id) -> Chat:
+    chat = await db.scalar(
+        select(Chat).where(Chat.id == chat_id, Chat.user_id == user_id)
+    )
+
+    if not chat:
+        raise HTTPException(404, "Chat not found")
+    return chat
+
+
+async def _load_history(db: AsyncSession, chat: Chat) -> tuple[list[dict], int]:
+    """
+    Rolling summary plus the messages it does not cover yet (normally the
+    last few turns), so the prompt stays flat as the chat grows.
+    Also returns the index of the turn being asked.
+    """
+    total = await db.scalar(
+        select(func.count())
+        .select_from(ChatMessage)
+        .where(ChatMessage.chat_id == chat.id)
+    )
+    pending = min(max(total - chat.summarized_count, 0), MAX_HISTORY_MESSAGES)
+
+    messages = []
+    if pending:
+        messages = (
+            await db.scalars(
+                select(ChatMessage)
+                .where(ChatMessage.chat_id == chat.id)
+                .order_by(ChatMessage.created_at.desc())
+                .limit(pending)
+            )
+        ).all()
+
+    history = build_history(
+        chat.summary,
+        [{"role": m.role, "content": m.content} for m in reversed(messages)],
+    )
+    return history, total // 2
+
+
+async def _save_turn(
+    chat_id,
+    question: str,
+    answer: str,
+    db: AsyncSession | None = None,
+    asked_at: datetime | None = None,
+    docs: list[Document] | None = None,
+    reused_context: bool = False,
+):
+    """
+    Persists the question, the answer with the chunks that backed it
+    (message_sources) and, unless they were reused from the previous turn,
+    those chunks as the chat's last context.
+    """
+    # Streaming responses outlive the request-scoped session,
+    # so they pass no session and the write uses its own.
+    if db is None:
+        async with AsyncSessionLocal() as own_db:
+            return await _save_turn(
+                chat_id,
+                question,
+                answer,
+                db=own_db,
+                asked_at=asked_at,
+                docs=docs,
+                reused_context=reused_context,
+            )
+
+    docs = docs or []
+
+    # Explicit timestamps: server now() is per transaction, which would
+    # give both rows the same created_at and an ambiguous order.
+    answered_at = datetime.now(timezone.utc)
+    db.add_all([
+        ChatMessage(chat_id=chat_id, role="user", content=question, created_at=asked_at or answered_at),
+        ChatMessage(
+            chat_id=chat_id,
+            role="assistant",
+            content=answer,
+            created_at=answered_at,
+            sources=_message_sources(docs),
+        ),
+    ])
+    if docs and not reused_context:
+        await db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(last_context=_context_json(docs))
+        )
+    await db.commit()
+
+    # ---- Fold older turns into the rolling summary (worker) ----
+    try:
+        update_chat_summary.delay(str(chat_id))
+    except Exception:
+        logger.warning("Could not enqueue summary update for chat %s", chat_id, exc_info=True)
+
+
+async def _create_chat(db: AsyncSession, user_id, question: str):
+    """
+    Creates the chat with a provisional title and starts generating the real
+    one in the background, so the LLM title call runs alongside the RAG
+    pipeline instead of before it.
+    """
+    chat = Chat(title=provisional_title(question), user_id=user_id)
+    db.add(chat)
+    await db.commit()
+
+    title_task = asyncio.create_task(_store_title(chat.id, question))
+    _background_tasks.add(title_task)
+    title_task.add_done_callback(_background_tasks.discard)
+    return chat, title_task
+
+
+async def _store_title(chat_id, question: str) -> str | None:
+    """
+    Generates and stores the chat title; runs as its own task so it is
+    persisted even when a streaming client disconnects early. On failure
+    the provisional title is kept and None is returned.
+    """
+    try:
+        title = await agenerate_chat_title(question)
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Chat).where(Chat.id == chat_id).values(title=title))
+            await db.commit()
+    except Exception:
+        logger.warning("Title generation failed for chat %s", chat_id, exc_info=True)
+        return None
+    return title
+
+
+async def _document_ids(db: AsyncSession, user_id, payload: ChatCreate) -> dict[str, str]:
+    """
+    Maps the ids the index knows the selected documents by (the canonical
+    document for deduplicated uploads) to the user's own document ids.
+    """
+    # ---- Guard: documents required ----
+    if not payload.document_ids:
+        raise HTTPException(
+            status_code=400,
+            detail="Please select documents to chat"
+        )
+
+    rows = await db.execute(
+        select(DocumentModel.id, DocumentModel.canonical_document_id).where(
+            DocumentModel.id.in_(payload.document_ids),
+            DocumentModel.user_id == user_id,
+            DocumentModel.deleted_at.is_(None),
+        )
+    )
+    aliases = {}
+    for document_id, canonical_id in rows:
+        aliases.setdefault(str(canonical_id or document_id), str(document_id))
+
+    if not aliases:
+        raise HTTPException(
+            status_code=400,
+            detail="Please select documents to chat"
+        )
+    return aliases
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SNIPPET_CHARS:
+        return text
+    cut = text.rfind(" ", 0, SNIPPET_CHARS)
+    return text[: cut if cut > 0 else SNIPPET_CHARS] + "…"
+
+
+def _sources(docs: list[Document], aliases: dict[str, str]) -> list[SourceRef]:
+    """
+    Compact citations; the UI fetches the full text from GET /chunks
+    when a citation is expanded. Document ids are the user's own ones.
+    """
+    sources = []
+    for doc in docs:
+        meta = doc.metadata
+        score = meta.get("relevance_score", meta.get("rrf_score"))
+        document_id = meta.get("document_id")
+        sources.append(SourceRef(
+            chunk_id=meta.get("chunk_id"),
+            document_id=aliases.get(str(document_id), document_id),
+            page=meta.get("page"),
+            score=score,
+            snippet=_snippet(doc.page_content),
+        ))
+    return sources
+
+
+def _context_json(docs: list[Document]) -> list[dict]:
+    return [
+        {
+            "page_content": d.page_content,
+            "metadata": {
+                k: v for k, v in d.metadata.items()
+                if v is None or isinstance(v, (str, int, float, bool))
+            },
+        }
+        for d in docs
+    ]
+
+
+def _message_sources(docs: list[Document]) -> list[MessageSource]:
+    sources = []
+    for rank, doc in enumerate(docs):
+        chunk_id = doc.metadata.get("chunk_id")
+        if not chunk_id:
+            continue
+        score = doc.metadata.get("relevance_score", doc.metadata.get("rrf_score"))
+        sources.append(MessageSource(
+            chunk_id=UUID(str(chunk_id)),
+            rank=rank,
+            score=float(score) if score is not None else None,
+        ))
+    return sources
+
+
+def _previous_context(chat: Chat, document_ids: list[str]) -> list[Document]:
+    # Chunks behind the previous answer, limited to the documents still selected
+    return [
+        Document(**d)
+        for d in chat.last_context or []
+        if str(d["metadata"].get("document_id")) in document_ids
+    ]
+
+
+async def _plan_retrieval(engine, chat: Chat, question: str, history: list[dict], document_ids: list[str]):
+    """
+    Returns (retriever, context_docs). Follow-ups that need no new context
+    ("make it shorter", "thanks") get the previous chunks as context_docs;
+    the others retrieve incrementally, merging fresh results with them.
+    """
+    previous = _previous_context(chat, document_ids)
+    retriever = engine.as_retriever(document_ids=document_ids, carry_over=previous or None)
+    if await needs_retrieval(question, history, has_context=bool(previous)):
+        return retriever, None
+    return retriever, previous
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _stream_answer(
+    chat,
+    question,
+    history,
+    retriever,
+    engine,
+    document_ids,
+    aliases,
+    started,
+    title_task=None,
+    turn=0,
+    context_docs=None,
+):
+    """
+    SSE body: `meta` (chat id/title), `sources`, one `token` event per
+    completion delta, `title` once a background title is stored, then `done`
+    with timings. Messages are persisted once the completion has finished.
+    `context_docs` answers from reused context instead of retrieving.
+    """
+    chat_id, title = chat.id, chat.title
+    asked_at = datetime.now(timezone.utc)
+
+    async def events():
+        yield _sse("meta", {"chat_id": chat_id, "title": title})
+
+        parts = []
+        docs = None
+        ttft_ms = None
+        try:
+            retrieval_query = None
+            if context_docs is None:
+                retrieval_query = await acondense_query(question, history, chat_id=chat_id, turn=turn)
+            async for kind, payload in astream_rag(
+                question,
+                history=history,
+                retriever=retriever,
+                answer_cache=engine.answer_cache,
+                document_ids=document_ids,
+                retrieval_query=retrieval_query,
+                context_docs=context_docs,
+            ):
+                if kind == "sources":
+                    docs = payload
+                    payload = [ref.model_dump(mode="json") for ref in _sources(docs, aliases)]
+                elif kind == "token":
+                    if ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - started) * 1000
+                    parts.append(payload)
+                yield _sse(kind, payload)
+        except Exception as e:
+            logger.exception("Streaming answer failed for chat %s", chat_id)
+            yield _sse("error", {"detail": str(e)})
+            return
+
+        answer = "".join(parts)
+        await _save_turn(
+            chat_id,
+            question,
+            answer,
+            asked_at=asked_at,
+            docs=docs,
+            reused_context=context_docs is not None,
+        )
+
+        if title_task is not None:
+            # Shielded: a client disconnect must not cancel the title task
+            new_title = await asyncio.shield(title_task)
+            if new_title:
+                yield _sse("title", {"chat_id": chat_id, "title": new_title})
+
+        total_ms = (time.perf_counter() - started) * 1000
+        logger.info("chat %s stream ttft=%.0fms total=%.0fms", chat_id, ttft_ms or -1, total_ms)
+        yield _sse("done", {"chat_id": chat_id, "ttft_ms": ttft_ms, "total_ms": total_ms})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 # =========================================================
 # CREATE NEW CHAT (FIRST MESSAGE)
 # POST /chat
 # =========================================================
 @chat_router.post("", response_model=ChatResponse)
-def create_chat(
+async def create_chat(
     payload: ChatCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user),
+    engine: RetrievalEngine = Depends(get_retrieval_engine),
 ):
-    # ---- Guard: documents required ----
-    if not payload.document_ids:
-        raise HTTPException(
-            status_code=400,
-            detail="Please select documents to chat"
-        )
+    asked_at = datetime.now(timezone.utc)
+    aliases = await _document_ids(db, user.id, payload)
+    document_ids = list(aliases)
 
-    # ---- Create chat ----
-    title = generate_chat_title(payload.message)
-    chat = Chat(title=title, user_id=user.id)
-    db.add(chat)
-    db.commit()
-    db.refresh(chat)
+    # ---- Create chat (title generated concurrently) ----
+    chat, title_task = await _create_chat(db, user.id, payload.message)
 
     # ---- RAG ----
-    retriever = build_retriever(
-        document_ids=[str(d) for d in payload.document_ids]
-    )
+    retriever = engine.as_retriever(document_ids=document_ids)
 
-    answer, docs = run_rag(
-        payload.message,
-        history=[],
-        retriever=retriever,
-    )
+    try:
+        answer, docs = await arun_rag(
+            payload.message,
+            history=[],
+            retriever=retriever,
+            answer_cache=engine.answer_cache,
+            document_ids=document_ids,
+        )
+    finally:
+        title = await asyncio.shield(title_task)
 
     # ---- Save messages ----
-    db.add_all([
-        ChatMessage(chat_id=chat.id, role="user", content=payload.message),
-        ChatMessage(chat_id=chat.id, role="assistant", content=answer),
-    ])
-    db.commit()
+    await _save_turn(chat.id, payload.message, answer, db=db, asked_at=asked_at, docs=docs)
 
     return {
         "chat_id": chat.id,
-        "title": chat.title,
+        "title": title or chat.title,
         "answer": answer,
-        "sources": docs,
+        "sources": _sources(docs, aliases),
     }
 
 
 # =========================================================
-# CONTINUE EXISTING CHAT
-# POST /chat/{chat_id}
+# CREATE NEW CHAT, STREAMED (SSE)
+# POST /chat/stream
 # =========================================================
-@chat_router.post("/{chat_id}", response_model=ChatResponse)
-def continue_chat(
-    chat_id: UUID,
+@chat_router.post("/stream")
+async def create_chat_stream(
     payload: ChatCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user),
+    engine: RetrievalEngine = Depends(get_retrieval_engine),
 ):
-    chat = (
-        db.query(Chat)
-        .filter(Chat.id == chat_id, Chat.user_id == user.id)
-        .first()
-    )
+    started = time.perf_counter()
+    aliases = await _document_ids(db, user.id, payload)
+    document_ids = list(aliases)
 
-    if not chat:
-        raise HTTPException(404, "Chat not found")
+    chat, title_task = await _create_chat(db, user.id, payload.message)
+    await db.close()
 
-    # ---- History (last 20) ----
-    messages = (
-        db.query(ChatMessage)
-        .filter(ChatMessage.chat_id == chat.id)
-        .order_by(ChatMessage.created_at.desc())
-        .limit(20)
-        .all()
+    return _stream_answer(
+        chat,
+        payload.message,
+        history=[],
+        retriever=engine.as_retriever(document_ids=document_ids),
+        engine=engine,
+        document_ids=document_ids,
+        aliases=aliases,
+        started=started,
+        title_task=title_task,
     )
 
-    history = [
-        {"role": m.role, "content": m.content}
-        for m in reversed(messages)
-    ]
 
-    # ---- RAG ----
-    retriever = build_retriever(
-        document_ids=[str(d) for d in payload.document_ids]
-        if payload.document_ids
-        else None
-    )
+# =========================================================
+# CONTINUE EXISTING CHAT
+# POST /chat/{chat_id}
+# =========================================================
+@chat_router.post("/{chat_id}", response_model=ChatResponse)
+async def continue_chat(
+    chat_id: UUID,
+    payload: ChatCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    engine: RetrievalEngine = Depends(get_retrieval_engine),
+):
+    asked_at = datetime.now(timezone.utc)
+    chat = await _get_chat(db, chat_id, user.id)
+    aliases = await _document_ids(db, user.id, payload)
+    document_ids = list(aliases)
+    history, turn = await _load_history(db, chat)
+    # End the read transaction so the pooled connection is not held
+    # through the LLM calls; _save_turn checks one out again.
+    await db.commit()
+
+    # ---- Reuse the previous context, or retrieve with a standalone rewrite ----
+    retriever, context_docs = await _plan_retrieval(engine, chat, payload.message, history, document_ids)
+    retrieval_query = None
+    if context_docs is None:
+        retrieval_query = await acondense_query(payload.message, history, chat_id=chat.id, turn=turn)
 
-    answer, docs = run_rag(
+    answer, docs = await arun_rag(
         payload.message,
         history=history,
         retriever=retriever,
+        answer_cache=engine.answer_cache,
+        document_ids=document_ids,
+        retrieval_query=retrieval_query,
+        context_docs=context_docs,
     )
 
     # ---- Save messages ----
-    db.add_all([
-        ChatMessage(chat_id=chat.id, role="user", content=payload.message),
-        ChatMessage(chat_id=chat.id, role="assistant", content=answer),
-    ])
-    db.commit()
+    await _save_turn(
+        chat.id,
+        payload.message,
+        answer,
+        db=db,
+        asked_at=asked_at,
+        docs=docs,
+        reused_context=context_docs is not None,
+    )
 
     return {
         "chat_id": chat.id,
         "title": chat.title,
         "answer": answer,
-        "sources": docs,
+        "sources": _sources(docs, aliases),
     }
+
+
+# =========================================================
+# CONTINUE EXISTING CHAT, STREAMED (SSE)
+# POST /chat/{chat_id}/stream
+# =========================================================
+@chat_router.post("/{chat_id}/stream")
+async def continue_chat_stream(
+    chat_id: UUID,
+    payload: ChatCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    engine: RetrievalEngine = Depends(get_retrieval_engine),
+):
+    started = time.perf_counter()
+
+    chat = await _get_chat(db, chat_id, user.id)
+    aliases = await _document_ids(db, user.id, payload)
+    document_ids = list(aliases)
+    history, turn = await _load_history(db, chat)
+    # The request session would otherwise stay open until the stream ends;
+    # the stream saves the turn with its own session.
+    await db.close()
+    retriever, context_docs = await _plan_retrieval(engine, chat, payload.message, history, document_ids)
+
+    return _stream_answer(
+        chat,
+        payload.message,
+        history=history,
+        retriever=retriever,
+        engine=engine,
+        document_ids=document_ids,
+        aliases=aliases,
+        started=started,
+        turn=turn,
+        context_docs=context_docs,
+    )
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from uuid import UUID
+
+from app.core.database import get_async_db
+from app.model.chunks import Chunk
+from app.model.documents import Document
+from app.schemas.chunk import ChunkOut
+from app.schemas.user import UserOutput
+from app.utils.protected_route import get_current_user
+from app.vector_store.elasticsearch_client import get_es, get_index_name
+
+chunk_router = APIRouter()
+
+MAX_IDS = 50
+
+
+def _parse_ids(ids: str) -> list[UUID]:
+    try:
+        parsed = list(dict.fromkeys(UUID(i.strip()) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid chunk id")
+
+    if not parsed:
+        raise HTTPException(status_code=400, detail="No chunk ids provided")
+    if len(parsed) > MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_IDS} chunk ids per request")
+    return parsed
+
+
+# =========================================================
+# FULL TEXT OF CITED CHUNKS
+# GET /chunks?ids=<uuid>,<uuid>,...
+# =========================================================
+@chunk_router.get("", response_model=List[ChunkOut])
+async def get_chunks(
+    ids: str = Query(..., description="Comma-separated chunk ids"),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserOutput = Depends(get_current_user),
+):
+    chunk_ids = _parse_ids(ids)
+
+    # ---- Ownership: only chunks of the user's documents, or of the
+    # canonical document a deduplicated upload of theirs points to ----
+    rows = (
+        await db.execute(
+            select(Chunk, Document.id)
+            .join(
+                Document,
+                or_(
+                    Document.id == Chunk.document_id,
+                    Document.canonical_document_id == Chunk.document_id,
+                ),
+            )
+            .where(
+                Chunk.id.in_(chunk_ids),
+                Document.user_id == user.id,
+                Document.deleted_at.is_(None),
+            )
+        )
+    ).all()
+    # Reported under the user's own document id
+    owned = {row.id: document_id for row, document_id in rows}
+    rows = list({row.id: row for row, _ in rows}.values())
+
+    chunks = {
+        row.id: ChunkOut(id=row.id, document_id=owned[row.id], page=row.page, content=row.content)
+        for row in rows
+        if row.content is not None
+    }
+
+    # ---- Chunks ingested before Postgres stored the text: BM25 index ----
+    legacy = [str(row.id) for row in rows if row.content is None]
+    if legacy:
+        response = await run_in_threadpool(
+            get_es().mget,
+            index=get_index_name(),
+            ids=legacy,
+            source_includes=["content", "document_id", "page"],
+        )
+        for doc in response["docs"]:
+            if doc.get("found"):
+                source = doc["_source"]
+                chunks[UUID(doc["_id"])] = ChunkOut(
+                    id=doc["_id"],
+                    document_id=owned[UUID(doc["_id"])],
+                    page=source.get("page"),
+                    content=source["content"],
+                )
+
+    # Requested order, missing chunks skipped
+    return [chunks[chunk_id] for chunk_id in chunk_ids if chunk_id in chunks]
@@ -1,32 +1,76 @@
 from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from datetime import datetime, timezone
 import os
+import hashlib
 from uuid import uuid4
 from dotenv import load_dotenv
 from app.vector_store.chroma_client import get_chroma
 from app.vector_store.elasticsearch_client import get_es, get_index_name
 from elasticsearch import helpers
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.model.documents import Document
 from app.model.enums import DocumentStatus
 from app.schemas.document import DocumentOut, DocumentCreate
 from app.schemas.user import UserOutput
 from app.utils.protected_route import get_current_user
-from app.supabase_client.supabase_client import supabase
+from app.storage.object_store import get_object_store
+from app.storage.handoff import handoff_enabled, write_handoff
 from app.tasks.document_processing_task import preprocess_document
 from app.model.chunks import Chunk
+from rag.cache import bump_document_generation
+from rag.metrics import metrics
 load_dotenv(override=True)
 
 document_router = APIRouter()
 
-BUCKET_NAME = os.getenv("SUPABASE_BUCKET")
 ALLOWED_FILETYPES = {"application/pdf"}
 
+async def _reference_canonical(db: AsyncSession, user_id, filename: str, content_hash: str) -> Document | None:
+    """
+    Creates the user's document as a reference to the live canonical
+    document with the same content, or returns None when there is none.
+    """
+    canonical = await db.scalar(
+        select(Document)
+        .where(
+            Document.content_hash == content_hash,
+            Document.canonical_document_id.is_(None),
+            Document.processed_status != DocumentStatus.FAILED,
+        )
+        .order_by(Document.created_at)
+        .limit(1)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    if canonical is None:
+        return None
+
+    canonical.ref_count += 1
+    document = Document(
+        title=filename,
+        url=canonical.url,
+        user_id=user_id,
+        processed_status=canonical.processed_status,
+        content_hash=content_hash,
+        canonical_document_id=canonical.id,
+    )
+    db.add(document)
+    await db.commit()
+    await db.refresh(document)
+
+    metrics.incr("documents.deduplicated")
+    return document
+
+
 @document_router.post("/upload", response_model=List[DocumentOut])
-def upload_document(
+async def upload_document(
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: UserOutput = Depends(get_current_user),
 ):
     if not files:
@@ -41,22 +85,39 @@ def upload_document(
                 detail=f"Invalid file type: {file.filename}"
             )
 
-        file_bytes = file.file.read()
+        file_bytes = await file.read()
+        content_hash = hashlib.sha256(file_bytes).hexdigest()
+
+        # -------------------------
+        # Identical file already ingested (by anyone): reference its
+        # chunks and vectors, no upload, no ingestion, no embeddings
+        # -------------------------
+        duplicate = await _reference_canonical(db, user.id, file.filename, content_hash)
+        if duplicate is not None:
+            documents.append(duplicate)
+            continue
+
         file_ext = os.path.splitext(file.filename)[1]
         file_id = uuid4()
 
         storage_path = f"{user.id}/{file_id}{file_ext}"
-
-        try:
-            supabase.storage.from_(BUCKET_NAME).upload(
-                path=storage_path,
-                file=file_bytes,
-                file_options={"content-type": file.content_type},
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-
-        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(storage_path)
+        object_store = get_object_store()
+
+        # With a shared handoff volume the worker ingests the local copy and
+        # uploads it afterwards; otherwise upload here and let the worker
+        # download it back from the public URL
+        if not handoff_enabled():
+            try:
+                await run_in_threadpool(
+                    object_store.upload,
+                    storage_path,
+                    file_bytes,
+                    file.content_type,
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+
+        public_url = object_store.public_url(storage_path)
 
         # -------------------------
         # Save document in DB
@@ -66,32 +127,62 @@ def upload_document(
             url=public_url,
             user_id=user.id,
             processed_status=DocumentStatus.PENDING,
+            content_hash=content_hash,
         )
 
-        db.add(document)
-        db.commit()
-        db.refresh(document)
+        try:
+            # Savepoint: losing the race below must not expire the
+            # documents already returned for earlier files
+            async with db.begin_nested():
+                db.add(document)
+        except IntegrityError:
+            # A concurrent upload of the same bytes became canonical first
+            # (uq_documents_canonical_content_hash); reference it instead.
+            # Without a handoff volume our object-store copy stays unused.
+            duplicate = await _reference_canonical(db, user.id, file.filename, content_hash)
+            if duplicate is None:
+                raise
+            documents.append(duplicate)
+            continue
+        await db.commit()
+        await db.refresh(document)
 
         # -------------------------
         # Trigger Celery (ASYNC)
         # -------------------------
-        preprocess_document.delay(str(document.id))
+        if handoff_enabled():
+            try:
+                local_path = await run_in_threadpool(write_handoff, document.id, file_bytes)
+            except Exception as e:
+                await db.delete(document)
+                await db.commit()
+                raise HTTPException(status_code=500, detail=str(e))
+
+            preprocess_document.delay(
+                str(document.id),
+                local_path=local_path,
+                storage_path=storage_path,
+                content_type=file.content_type,
+            )
+        else:
+            preprocess_document.delay(str(document.id))
 
         documents.append(document)
 
     return documents
 
 @document_router.get("/", response_model=List[DocumentOut])
-def get_all_documents(
-    db: Session = Depends(get_db),
+async def get_all_documents(
+    db: AsyncSession = Depends(get_async_db),
     user: UserOutput = Depends(get_current_user),
 ):
     documents = (
-        db.query(Document)
-        .filter(Document.user_id == user.id)
-        .order_by(Document.created_at.desc())
-        .all()
-    )
+        await db.scalars(
+            select(Document)
+            .where(Document.user_id == user.id, Document.deleted_at.is_(None))
+            .order_by(Document.created_at.desc())
+        )
+    ).all()
 
     return documents
 
@@ -166,46 +257,37 @@ def get_all_documents(
 #         "message": "Document and related chunks deleted successfully",
 #         "document_id": document_id,
 #     }
-@document_router.delete("/{document_id}", status_code=200)
-def delete_document(
-    document_id: str,
-    db: Session = Depends(get_db),
-    user: UserOutput = Depends(get_current_user),
-):
-    document = (
-        db.query(Document)
-        .filter(
-            Document.id == document_id,
-            Document.user_id == user.id,
-        )
-        .first()
-    )
-
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
-
+async def _purge_document(db: AsyncSession, document: Document):
+    """
+    Removes a canonical document's index entries, chunks and row.
+    Committing is left to the caller.
+    """
     # -------------------------
     # Fetch chunk IDs
     # -------------------------
     chunk_ids = [
-        str(c[0])
-        for c in db.query(Chunk.id)
-        .filter(Chunk.document_id == document.id)
-        .all()
+        str(cid)
+        for cid in await db.scalars(
+            select(Chunk.id).where(Chunk.document_id == document.id)
+        )
     ]
 
     # -------------------------
     # Delete from Chroma (CORRECT)
     # -------------------------
-    get_chroma().delete(
-        where={"document_id": str(document.id)}
+    # Building the vectorstore talks to Chroma (heartbeat, collection
+    # lookup) too, so it runs in the thread as well
+    document_key = str(document.id)
+    await run_in_threadpool(
+        lambda: get_chroma().delete(where={"document_id": document_key})
     )
 
     # -------------------------
     # Delete from Elasticsearch
     # -------------------------
     if chunk_ids:
-        helpers.bulk(
+        await run_in_threadpool(
+            helpers.bulk,
             get_es(),
             [
                 {
@@ -222,12 +304,59 @@ def delete_document(
     # -------------------------
     # Delete from DB
     # -------------------------
-    db.query(Chunk)\
-      .filter(Chunk.document_id == document.id)\
-      .delete(synchronize_session=False)
+    await db.execute(
+        delete(Chunk).where(Chunk.document_id == document.id)
+    )
+
+    await db.delete(document)
+
+
+@document_router.delete("/{document_id}", status_code=200)
+async def delete_document(
+    document_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    user: UserOutput = Depends(get_current_user),
+):
+    document = await db.scalar(
+        select(Document).where(
+            Document.id == document_id,
+            Document.user_id == user.id,
+            Document.deleted_at.is_(None),
+        )
+    )
+
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    # -------------------------
+    # Drop one reference; index entries go with the last one
+    # -------------------------
+    canonical = await db.scalar(
+        select(Document)
+        .where(Document.id == (document.canonical_document_id or document.id))
+        .with_for_update()
+        # The canonical may be `document` itself, already in the identity
+        # map: reload it so ref_count is the value read under the lock
+        .execution_options(populate_existing=True)
+    )
+    canonical.ref_count -= 1
+
+    if document is not canonical:
+        await db.delete(document)
+        await db.flush()
+
+    purged = canonical.ref_count <= 0
+    if purged:
+        await _purge_document(db, canonical)
+    elif document is canonical:
+        # Still used by duplicates: hide it, keep its chunks
+        canonical.deleted_at = datetime.now(timezone.utc)
+
+    await db.commit()
 
-    db.delete(document)
-    db.commit()
+    if purged:
+        # Redis round trip; keep it off the event loop
+        await run_in_threadpool(bump_document_generation, canonical.id)
 
     return {
         "success": True,
@@ -235,18 +364,17 @@ def delete_document(
     }
 
 @document_router.get("/{document_id}", response_model=DocumentOut)
-def get_document_by_id(
+async def get_document_by_id(
     document_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: UserOutput = Depends(get_current_user),
 ):
-    document = (
-        db.query(Document)
-        .filter(
+    document = await db.scalar(
+        select(Document).where(
             Document.id == document_id,
             Document.user_id == user.id,
+            Document.deleted_at.is_(None),
         )
-        .first()
     )
 
     if not document:
@@ -6,8 +6,16 @@ class ChatCreate(BaseModel):
     message: str
     document_ids: Optional[List[UUID]] = None
 
+class SourceRef(BaseModel):
+    # Compact citation; the full text is fetched from GET /chunks on demand
+    chunk_id: Optional[UUID] = None
+    document_id: Optional[UUID] = None
+    page: Optional[int] = None
+    score: Optional[float] = None
+    snippet: str
+
 class ChatResponse(BaseModel):
     chat_id: UUID
     title: str
     answer: str
-    sources: list
+    sources: List[SourceRef]
@@ -0,0 +1,9 @@
+from uuid import UUID
+from typing import Optional
+from pydantic import BaseModel
+
+class ChunkOut(BaseModel):
+    id: UUID
+    document_id: UUID
+    page: Optional[int] = None
+    content: str
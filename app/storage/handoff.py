@@ -0,0 +1,42 @@
+import os
+import tempfile
+from dotenv import load_dotenv
+load_dotenv(override=True)
+
+# Volume shared by the API and the Celery worker. When set, uploads are
+# handed to the worker as a local file instead of a URL to download back;
+# unset keeps the URL round trip (API and worker on different hosts).
+HANDOFF_DIR = os.getenv("INGEST_HANDOFF_DIR")
+HANDOFF_SUFFIX = ".pdf"
+# Handoff files nobody picked up (lost task, worker gone) are swept after this
+HANDOFF_ORPHAN_AGE = int(os.getenv("INGEST_HANDOFF_ORPHAN_AGE", str(24 * 3600)))
+
+
+def handoff_enabled() -> bool:
+    return bool(HANDOFF_DIR)
+
+
+def write_handoff(document_id, data: bytes) -> str:
+    """
+    Writes the uploaded bytes for `document_id` atomically (temp file +
+    rename, so the worker never sees a partial file) and returns the path.
+    """
+    os.makedirs(HANDOFF_DIR, exist_ok=True)
+    path = os.path.join(HANDOFF_DIR, f"{document_id}{HANDOFF_SUFFIX}")
+
+    fd, tmp_path = tempfile.mkstemp(dir=HANDOFF_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+def remove_handoff(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,60 @@
+import os
+import shutil
+from pathlib import Path
+from functools import lru_cache
+from dotenv import load_dotenv
+load_dotenv(override=True)
+
+# "supabase" (default) or "local": a directory stand-in for tests and
+# local development, no network involved
+OBJECT_STORE = os.getenv("OBJECT_STORE", "supabase").lower()
+LOCAL_OBJECT_STORE_DIR = os.getenv("LOCAL_OBJECT_STORE_DIR", "data/object_store")
+BUCKET_NAME = os.getenv("SUPABASE_BUCKET")
+
+
+class SupabaseObjectStore:
+    def __init__(self, bucket: str):
+        from app.supabase_client.supabase_client import supabase
+        self.bucket = supabase.storage.from_(bucket)
+
+    def upload(self, path: str, data: bytes | str, content_type: str):
+        """`data`: the bytes, or the path of a local file to upload."""
+        self.bucket.upload(
+            path=path,
+            file=data,
+            # Paths are unique per upload; upsert lets a retried upload
+            # overwrite a partial or already completed earlier attempt
+            file_options={"content-type": content_type, "upsert": "true"},
+        )
+
+    def public_url(self, path: str) -> str:
+        return self.bucket.get_public_url(path)
+
+
+class LocalObjectStore:
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _target(self, path: str) -> Path:
+        target = (self.root / path).resolve()
+        if self.root not in target.parents:
+            raise ValueError(f"Invalid object path: {path}")
+        return target
+
+    def upload(self, path: str, data: bytes | str, content_type: str):
+        target = self._target(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, bytes):
+            target.write_bytes(data)
+        else:
+            shutil.copyfile(data, target)
+
+    def public_url(self, path: str) -> str:
+        return self._target(path).as_uri()
+
+
+@lru_cache(maxsize=1)
+def get_object_store():
+    if OBJECT_STORE == "local":
+        return LocalObjectStore(LOCAL_OBJECT_STORE_DIR)
+    return SupabaseObjectStore(BUCKET_NAME)
@@ -0,0 +1,71 @@
+from app.core.celery.celery_app import celery_app
+from app.model.chats import Chat
+from app.model.messages import ChatMessage
+from app.core.database import SessionLocal
+from rag.memory import RECENT_MESSAGES, summarize_conversation
+import logging
+from sqlalchemy import update
+import app.model
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True)
+def update_chat_summary(self, chat_id: str):
+    """
+    Folds every message older than the last RECENT_TURNS turns into
+    Chat.summary, incrementally (only messages not summarized yet).
+
+    Optimistic: no row lock is held across the LLM call (it would block
+    inserting the next turn's messages); the result is applied only if no
+    concurrent run moved summarized_count in the meantime.
+    """
+    db = SessionLocal()
+
+    try:
+        chat = db.query(Chat).filter(Chat.id == chat_id).first()
+
+        if not chat:
+            return
+
+        summary, summarized_count = chat.summary, chat.summarized_count
+        total = db.query(ChatMessage).filter(ChatMessage.chat_id == chat.id).count()
+        foldable = total - RECENT_MESSAGES - summarized_count
+        if foldable <= 0:
+            db.rollback()
+            return
+
+        messages = [
+            {"role": m.role, "content": m.content}
+            for m in (
+                db.query(ChatMessage)
+                .filter(ChatMessage.chat_id == chat.id)
+                .order_by(ChatMessage.created_at.asc())
+                .offset(summarized_count)
+                .limit(foldable)
+                .all()
+            )
+        ]
+        # End the read transaction before the network call
+        db.rollback()
+
+        new_summary = summarize_conversation(summary, messages)
+
+        result = db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id, Chat.summarized_count == summarized_count)
+            .values(summary=new_summary, summarized_count=summarized_count + len(messages))
+        )
+        if result.rowcount == 0:
+            # A concurrent run folded these messages first
+            logger.info("Dropping stale summary for chat %s", chat_id)
+            db.rollback()
+            return
+        db.commit()
+
+    except Exception:
+        db.rollback()
+        raise
+
+    finally:
+        db.close()
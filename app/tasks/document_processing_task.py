@@ -2,15 +2,44 @@ from app.core.celery.celery_app import celery_app
 from sqlalchemy.orm import Session
 from app.model.documents import Document
 from app.model.chunks import Chunk
+from app.repository.chunk_repository import ChunkRepository
 from app.model.enums import DocumentStatus
 from app.core.database import get_db, SessionLocal
-from app.vector_store.ingest import ingest_document_from_url
+from app.vector_store.ingest import ingest_document_from_url, ingest_pdf
+from app.storage.object_store import get_object_store
+from app.storage.handoff import remove_handoff
+import os
+import logging
+from rag.cache import bump_document_generation
 import app.model
 
+logger = logging.getLogger(__name__)
+
+UPLOAD_MAX_RETRIES = int(os.getenv("DOCUMENT_UPLOAD_MAX_RETRIES", "5"))
+
+def _sync_duplicates(db: Session, document: Document):
+    # Duplicates uploaded while this one was ingesting share its outcome
+    db.query(Document).filter(
+        Document.canonical_document_id == document.id
+    ).update({Document.processed_status: document.processed_status})
+
+
 @celery_app.task(bind=True)
-def preprocess_document(self, document_id: str):
+def preprocess_document(
+    self,
+    document_id: str,
+    local_path: str | None = None,
+    storage_path: str | None = None,
+    content_type: str = "application/pdf",
+):
+    """
+    `local_path`: the upload handed over by the API on a shared volume. It is
+    ingested in place, then uploaded to `storage_path` in the object store
+    by upload_document; without it the PDF is downloaded from the document URL.
+    """
     db = SessionLocal()
     document = None  
+    handed_over = bool(local_path) and os.path.exists(local_path)
 
     try:
         document = db.query(Document).filter(
@@ -20,30 +49,89 @@ def preprocess_document(self, document_id: str):
         if not document:
             return
 
-        chunk_data = ingest_document_from_url(
-            document_id=document.id,
-            pdf_url=document.url,
-        )
-
-        for chunk in chunk_data:
-            db.add(
-                Chunk(
-                    id=chunk["chunk_id"],
-                    document_id=document.id,
-                )
+        chunk_repository = ChunkRepository(session=db)
+
+        def write_chunk_rows(batch):
+            # COPY (or multi-row INSERT batches) instead of an ORM object per
+            # chunk; rows are committed together with the status below
+            chunk_repository.bulk_insert([
+                {
+                    "id": chunk["chunk_id"],
+                    "document_id": document.id,
+                    "content": chunk["content"],
+                    "page": chunk["page"],
+                    "ordinal": chunk["ordinal"],
+                    "char_start": chunk["char_start"],
+                    "char_end": chunk["char_end"],
+                    "token_count": chunk["token_count"],
+                    "content_hash": chunk["content_hash"],
+                    "dup_group": chunk.get("dup_group"),
+                }
+                for chunk in batch
+            ])
+
+        # Streamed: each batch goes to Chroma, ES and Postgres before the next
+        # one is read from the PDF
+        if handed_over:
+            ingest_pdf(local_path, document.id, on_batch=write_chunk_rows)
+        else:
+            ingest_document_from_url(
+                document_id=document.id,
+                pdf_url=document.url,
+                on_batch=write_chunk_rows,
             )
 
         document.processed_status = DocumentStatus.COMPLETED
+        _sync_duplicates(db, document)
         db.commit()
 
+        bump_document_generation(document.id)
+
     except Exception:
         db.rollback()
 
         if document is not None:
             document.processed_status = DocumentStatus.FAILED
+            _sync_duplicates(db, document)
             db.commit()
+            # a partial ingest may already be visible in the indexes
+            bump_document_generation(document.id)
 
         raise
 
+    else:
+        # Only after the rows and the status are committed: a failing upload
+        # is retried on its own and never fails the ingest
+        if handed_over:
+            try:
+                upload_document.delay(local_path, storage_path, content_type)
+                local_path = None  # removed by upload_document
+            except Exception:
+                logger.exception("Could not enqueue the upload of document %s", document.id)
+
     finally:
         db.close()
+        if local_path:
+            remove_handoff(local_path)
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=UPLOAD_MAX_RETRIES,
+)
+def upload_document(self, local_path: str, storage_path: str, content_type: str = "application/pdf"):
+    """
+    Uploads an ingested handoff file to the object store; the URL saved by
+    the API resolves once this succeeds. The file is removed after the
+    upload or the last failed attempt.
+    """
+    try:
+        get_object_store().upload(storage_path, local_path, content_type)
+    except Exception:
+        if self.request.retries >= self.max_retries:
+            logger.error("Upload of %s failed after %d retries", storage_path, self.max_retries)
+            remove_handoff(local_path)
+        raise
+    remove_handoff(local_path)
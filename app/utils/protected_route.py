@@ -1,14 +1,14 @@
-from fastapi import HTTPException , Depends , status, Header
-from sqlalchemy.orm import Session
+import uuid
+from fastapi import HTTPException , status, Header
 from typing import Annotated , Union
 from app.core.security.authHandler import AuthHandler
-from app.service.user_service import UserService
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal
+from app.model.user import User
 from app.schemas.user import UserOutput
 
 
 AUTH_PREFIX = "Bearer "
-def get_current_user(session:Session = Depends(get_db), authorization: Annotated[Union[str , None], Header()] = None):
+async def get_current_user(authorization: Annotated[Union[str , None], Header()] = None):
     auth_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Unauthorized, Invalid Credentials"
@@ -20,16 +20,17 @@ def get_current_user(session:Session = Depends(get_db), authorization: Annotated
     
     payload = AuthHandler.decode_jwt(token=authorization[len(AUTH_PREFIX):])
     if payload and payload['user_id']:
-        try:    
-            user = UserService(session = session).get_user_by_id(payload['user_id'])
-            return UserOutput(
-                id = user.id, 
-                first_name = user.first_name, 
-                last_name = user.last_name,
-                email = user.email
-            )
-        except Exception as e:
-            print(e)
-            raise e
+        # Own short-lived session: a request-scoped one would keep a pooled
+        # connection checked out until the (possibly streamed) response ends.
+        async with AsyncSessionLocal() as session:
+            user = await session.get(User, uuid.UUID(str(payload['user_id'])))
+        if not user:
+            raise HTTPException(status_code=400, detail="User is not available")
+        return UserOutput(
+            id = user.id, 
+            first_name = user.first_name, 
+            last_name = user.last_name,
+            email = user.email
+        )
     else:
-        raise auth_exception
\ No newline at end of file
+        raise auth_exception
@@ -48,15 +48,23 @@ load_dotenv(override=True)
 # app/vector_store/chroma_client.py
 
 import os
+from functools import lru_cache
 import chromadb
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 
-_embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+COLLECTION_NAME = "rag_collection"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 
-def get_chroma():
+_embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+
+
+@lru_cache(maxsize=1)
+def get_chroma_client():
     """
-    Connects to the running Chroma server via HttpClient.
+    Returns the process-wide Chroma HttpClient.
+    The heartbeat only runs the first time, the client (and its HTTP pool)
+    is reused afterwards.
     """
     host = os.getenv("CHROMA_SERVER_HOST", "rag_chroma")
     port = int(os.getenv("CHROMA_SERVER_PORT", "8000"))
@@ -72,8 +80,23 @@ def get_chroma():
     except Exception as e:
         raise ConnectionError(f"Failed to connect to Chroma server at {host}:{port}. Is the container running?") from e
 
+    return client
+
+
+def get_chroma(embedding_function=None):
+    """
+    Connects to the running Chroma server via the shared HttpClient.
+    """
     return Chroma(
-        client=client,
-        embedding_function=_embeddings,
-        collection_name="rag_collection", 
-    )
\ No newline at end of file
+        client=get_chroma_client(),
+        embedding_function=embedding_function or _embeddings,
+        collection_name=COLLECTION_NAME,
+    )
+
+
+def get_chroma_collection():
+    """
+    The raw collection behind `get_chroma()`, for writes that bring their
+    own embeddings (ingestion embeds through the EmbeddingExecutor).
+    """
+    return get_chroma_client().get_or_create_collection(name=COLLECTION_NAME)
@@ -6,12 +6,14 @@ load_dotenv(override=True)
 
 ELASTIC_URL = os.getenv("ELASTIC_URL", "http://localhost:9200")
 INDEX_NAME = os.getenv("ELASTIC_INDEX", "research-papers")
+POOL_SIZE = int(os.getenv("ELASTIC_POOL_SIZE", "25"))
 
 es = Elasticsearch(
     ELASTIC_URL,
     request_timeout=120,
     max_retries=3,
     retry_on_timeout=True,
+    connections_per_node=POOL_SIZE,
 )
 
 def get_es():
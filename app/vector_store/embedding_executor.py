@@ -0,0 +1,241 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Sequence
+
+import openai
+from redis import RedisError
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from app.core.redis_client import get_redis
+from app.vector_store.chroma_client import EMBEDDING_MODEL
+from rag.cache.keys import make_key
+from rag.cache.embedding_store import EmbeddingStore, content_hash
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Embedding requests in flight per worker process
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Upper bounds of one embedding request
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "8000"))
+EMBED_BATCH_MAX_INPUTS = int(os.getenv("EMBED_BATCH_MAX_INPUTS", "256"))
+# Tokens per minute allowed for the model, shared by every worker through
+# Redis (per process without Redis); 0 disables the limit
+EMBED_TPM = int(os.getenv("EMBED_TPM", "1000000"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+EMBED_BACKOFF_SECONDS = float(os.getenv("EMBED_BACKOFF_SECONDS", "1.0"))
+EMBED_BACKOFF_MAX_SECONDS = 30.0
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """
+    Process-local tokens-per-minute limiter: refills continuously, and
+    `acquire` blocks until the requested tokens are available.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _wait_time(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: int):
+        # A request larger than the whole budget waits for a full bucket
+        tokens = min(tokens, self.capacity)
+        while (wait := self._wait_time(tokens)) > 0:
+            time.sleep(wait)
+
+
+class SharedTokenBudget:
+    """
+    Tokens-per-minute budget shared by all workers: a per-minute counter in
+    Redis. Falls back to the local bucket when Redis is missing or failing.
+    """
+
+    def __init__(self, tokens_per_minute: int, name: str, redis_client=None):
+        self.tokens_per_minute = tokens_per_minute
+        self.name = name
+        self.redis = redis_client if redis_client is not None else get_redis()
+        self.local = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int):
+        tokens = min(tokens, self.tokens_per_minute)
+        if self.redis is None:
+            self.local.acquire(tokens)
+            return
+
+        while True:
+            now = time.time()
+            window = int(now // 60)
+            key = make_key("embed_tpm", self.name, str(window))
+            try:
+                used = self.redis.incrby(key, tokens)
+                if used == tokens:
+                    self.redis.expire(key, 120)
+                if used <= self.tokens_per_minute:
+                    return
+                self.redis.decrby(key, tokens)
+            except RedisError:
+                logger.warning("Embedding budget: Redis unavailable, using the local limit", exc_info=True)
+                self.local.acquire(tokens)
+                return
+
+            metrics.incr("embedding_executor.throttled")
+            time.sleep((window + 1) * 60 - now + random.uniform(0, 0.5))
+
+
+def token_batches(token_counts: Sequence[int], max_tokens: int, max_inputs: int) -> List[range]:
+    """
+    Splits inputs into consecutive index ranges of at most `max_tokens`
+    tokens and `max_inputs` inputs (an oversized input gets its own batch).
+    """
+    batches, start, total = [], 0, 0
+    for i, count in enumerate(token_counts):
+        if i > start and (total + count > max_tokens or i - start >= max_inputs):
+            batches.append(range(start, i))
+            start, total = i, 0
+        total += count
+    if start < len(token_counts):
+        batches.append(range(start, len(token_counts)))
+    return batches
+
+
+class EmbeddingJob:
+    """
+    Embeddings of one submit(), in input order: the ones found in the store
+    plus, per pending batch, its input positions and future.
+    """
+
+    def __init__(self, vectors: List[List[float] | None], pending: List[tuple[List[int], Future]]):
+        self.vectors = vectors
+        self.pending = pending
+
+    def result(self) -> List[List[float]]:
+        for positions, future in self.pending:
+            for position, vector in zip(positions, future.result()):
+                self.vectors[position] = vector
+        self.pending = []
+        return self.vectors
+
+    def cancel(self):
+        for _, future in self.pending:
+            future.cancel()
+
+
+class EmbeddingExecutor:
+    """
+    Embeds documents in token-bounded batches, `concurrency` requests at a
+    time, within a tokens-per-minute budget. A failed batch is retried on
+    its own with exponential backoff; the others are not resent.
+
+    With a `store`, texts already embedded by the same model are read from
+    it and never sent; new embeddings are written back.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        concurrency: int = EMBED_CONCURRENCY,
+        budget: TokenBucket | SharedTokenBudget | None = None,
+        batch_tokens: int = EMBED_BATCH_TOKENS,
+        batch_max_inputs: int = EMBED_BATCH_MAX_INPUTS,
+        max_retries: int = EMBED_MAX_RETRIES,
+        retryable: tuple = RETRYABLE_ERRORS,
+        store: EmbeddingStore | None = None,
+    ):
+        self.embeddings = embeddings
+        self.store = store
+        self.budget = budget
+        self.batch_tokens = batch_tokens
+        self.batch_max_inputs = batch_max_inputs
+        self.max_retries = max_retries
+        self.retryable = retryable
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed")
+
+    def _embed_batch(self, texts: List[str], tokens: int, hashes: List[str] | None) -> List[List[float]]:
+        attempt = 0
+        while True:
+            if self.budget is not None:
+                self.budget.acquire(tokens)
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                metrics.incr("embedding_executor.requests")
+                metrics.incr("embedding_executor.tokens", tokens)
+                if self.store is not None:
+                    self.store.put_many(dict(zip(hashes, vectors)))
+                return vectors
+            except self.retryable:
+                attempt += 1
+                metrics.incr("embedding_executor.retries")
+                if attempt > self.max_retries:
+                    raise
+                delay = min(EMBED_BACKOFF_MAX_SECONDS, EMBED_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                logger.warning("Embedding batch failed (attempt %d), retrying in %.1fs", attempt, delay, exc_info=True)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def submit(self, texts: Sequence[str], token_counts: Sequence[int], hashes: Sequence[str] | None = None) -> EmbeddingJob:
+        """
+        `hashes`: sha256 of each text, when the caller already has them
+        (chunk records carry `content_hash`).
+        """
+        vectors = [None] * len(texts)
+        if self.store is not None:
+            hashes = hashes or [content_hash(t) for t in texts]
+            found = self.store.get_many(hashes)
+            for i, digest in enumerate(hashes):
+                vectors[i] = found.get(digest)
+            metrics.incr("embedding_executor.stored", len(texts) - vectors.count(None))
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        pending = []
+        for batch in token_batches([token_counts[i] for i in missing], self.batch_tokens, self.batch_max_inputs):
+            positions = [missing[i] for i in batch]
+            future = self.pool.submit(
+                self._embed_batch,
+                [texts[i] for i in positions],
+                sum(token_counts[i] for i in positions),
+                [hashes[i] for i in positions] if self.store is not None else None,
+            )
+            pending.append((positions, future))
+        return EmbeddingJob(vectors, pending)
+
+    def embed(self, texts: Sequence[str], token_counts: Sequence[int], hashes: Sequence[str] | None = None) -> List[List[float]]:
+        return self.submit(texts, token_counts, hashes).result()
+
+
+@lru_cache(maxsize=1)
+def get_embedding_executor() -> EmbeddingExecutor:
+    """
+    Process-wide executor for ingestion, backed by the persistent
+    EmbeddingStore. Retries are handled here, so the client's own retries
+    are turned off.
+    """
+    return EmbeddingExecutor(
+        OpenAIEmbeddings(model=EMBEDDING_MODEL, max_retries=0),
+        budget=SharedTokenBudget(EMBED_TPM, EMBEDDING_MODEL) if EMBED_TPM > 0 else None,
+        store=EmbeddingStore(EMBEDDING_MODEL),
+    )
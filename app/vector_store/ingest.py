@@ -1,117 +1,403 @@
+import gc
+import os
+import re
+import math
 import uuid
-import tempfile
-import requests
+import logging
 from uuid import UUID
-from typing import List, Dict
+from itertools import islice
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List
 
 from elasticsearch import helpers
+from pypdf import PdfReader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
 
-from app.vector_store.chroma_client import get_chroma
+from app.vector_store.chroma_client import get_chroma_collection
+from app.vector_store.embedding_executor import EMBED_CONCURRENCY, get_embedding_executor
 from app.vector_store.elasticsearch_client import get_es, get_index_name
+from app.vector_store.spool import spooled_download
+from rag.context_packer import count_tokens
+from rag.cache.embedding_store import content_hash
+from rag.near_duplicates import NEAR_DUP_ENABLED, NearDuplicateTagger
+from rag.metrics import metrics
 
+logger = logging.getLogger(__name__)
 
-def ingest_document_from_url(
-    document_id: UUID,
-    pdf_url: str,
-) -> List[Dict]:
+# Chunks embedded and written per round trip; peak memory is bounded by
+# one page plus one batch, whatever the size of the PDF
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# Batches embedding while earlier ones are being written
+INGEST_PIPELINE_DEPTH = int(os.getenv("INGEST_PIPELINE_DEPTH", str(EMBED_CONCURRENCY)))
+# Pages parsed per PdfReader; pypdf keeps every object it resolves until its
+# reader goes away, so a long PDF is read through a series of readers. Each
+# new reader re-reads the page tree, so this trades memory against parse time
+INGEST_PAGES_PER_READER = int(os.getenv("INGEST_PAGES_PER_READER", "200"))
+
+# Pre-chunking cleanup: running headers/footers and page numbers repeated
+# across pages, and the bibliography, are not worth chunking or embedding
+INGEST_STRIP_BOILERPLATE = os.getenv("INGEST_STRIP_BOILERPLATE", "true").lower() == "true"
+INGEST_STRIP_REFERENCES = os.getenv("INGEST_STRIP_REFERENCES", "true").lower() == "true"
+# Pages buffered before the first decision (keeps ingestion streaming)
+BOILERPLATE_WINDOW = 10
+# A header/footer line is boilerplate once seen on this many pages and on
+# this share of the pages read so far
+BOILERPLATE_MIN_PAGES = 3
+BOILERPLATE_MIN_SHARE = 0.4
+# Lines at the top and bottom of a page that may be headers/footers
+EDGE_LINES = 3
+
+_DIGITS = re.compile(r"\d+")
+_REFERENCES_HEADING = re.compile(
+    r"^\s*(?:[\dIVX]+\.?\s+)?(?:references|bibliography|works cited|literature cited)\s*$",
+    re.IGNORECASE,
+)
+# Appendices after the bibliography are kept: "Appendix ...", or a bare
+# lettered heading such as "A Dataset curation" (a false match only keeps
+# some references)
+_AFTER_REFERENCES_HEADING = re.compile(
+    r"^\s*(?:(?:[\dA-Z]+\.?\s+)?(?i:appendix|appendices|supplementary)\b"
+    r"|A(?:\.1)?\.?\s+[A-Z][A-Za-z\- ]{2,50}$)",
+)
+
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 300
+
+
+def _splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True,  # char offset of the chunk in its (cleaned) page
+    )
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_pages(pdf_path: str) -> Iterator[Document]:
     """
-    Downloads a PDF, splits into chunks, ingests into:
-    - Chroma (dense embeddings)
-    - Elasticsearch (BM25)
-    Returns chunk metadata for database persistence.
+    Yields one Document per page (same text and `source`/`page`/`total_pages`
+    metadata as PyPDFLoader). The file is read through a handle instead of
+    being loaded into memory, and a fresh PdfReader is opened every
+    INGEST_PAGES_PER_READER pages so the objects pypdf caches while parsing
+    are released with the previous one.
+    """
+    with open(pdf_path, "rb") as fh:
+        reader = PdfReader(fh)
+        total_pages = len(reader.pages)
+        for number in range(total_pages):
+            if number and number % INGEST_PAGES_PER_READER == 0:
+                # The old reader and its pages reference each other; collect
+                # them before the next reader parses the page tree again
+                reader = None
+                gc.collect()
+                reader = PdfReader(fh)
+            text = reader.pages[number].extract_text()
+            yield Document(
+                page_content=text,
+                metadata={"source": pdf_path, "page": number, "total_pages": total_pages},
+            )
+
+
+@dataclass
+class CleanupStats:
+    """What pre-chunking cleanup removed from one document."""
+
+    boilerplate_lines: int = 0
+    reference_lines: int = 0
+    # Chunks and tokens produced, and the estimated savings (see
+    # _estimate_savings); raw pages are not split a second time
+    chunks: int = 0
+    tokens: int = 0
+    chunks_saved: int = 0
+    tokens_saved: int = 0
+
+    @property
+    def raw_chunks(self) -> int:
+        return self.chunks + self.chunks_saved
+
+    @property
+    def raw_tokens(self) -> int:
+        return self.tokens + self.tokens_saved
+
+
+def _line_key(line: str) -> str:
+    # "Page 3 of 12" and "Page 4 of 12" are the same footer
+    return _DIGITS.sub("#", " ".join(line.lower().split()))
+
+
+def _edge_lines(lines: List[str]) -> set:
+    """Indices of the first and last EDGE_LINES non-empty lines."""
+    nonempty = [i for i, line in enumerate(lines) if line.strip()]
+    return set(nonempty[:EDGE_LINES] + nonempty[-EDGE_LINES:])
+
+
+def _estimated_chunks(length: int) -> int:
+    # Chunks the splitter makes of `length` characters, ignoring separator snapping
+    if length <= 0:
+        return 0
+    if length <= CHUNK_SIZE:
+        return 1
+    return math.ceil((length - CHUNK_OVERLAP) / (CHUNK_SIZE - CHUNK_OVERLAP))
+
+
+def _estimate_savings(stats: CleanupStats, raw: str, cleaned: str, removed: List[str]):
+    """
+    Chunks and embedding tokens the removed lines would have cost, from the
+    page lengths and the removed text only. Overlapping chunks embed each
+    character about chunks * chunk length / page length times.
+    """
+    raw_chunks = _estimated_chunks(len(raw.strip()))
+    stats.chunks_saved += raw_chunks - _estimated_chunks(len(cleaned.strip()))
+    repeats = raw_chunks * min(len(raw), CHUNK_SIZE) / len(raw)
+    stats.tokens_saved += round(count_tokens("\n".join(removed)) * repeats)
+
+
+def clean_pages(
+    pages: Iterable[Document],
+    stats: CleanupStats,
+    strip_boilerplate: bool = INGEST_STRIP_BOILERPLATE,
+    strip_references: bool = INGEST_STRIP_REFERENCES,
+) -> Iterator[Document]:
+    """
+    Removes header/footer lines repeated across pages and, optionally, the
+    references section (from its heading, in the second half of the
+    document, up to an appendix heading or the end).
+
+    Repetition is counted over the pages read so far; the first
+    BOILERPLATE_WINDOW pages are held back until there is enough to count.
+    """
+    counts = Counter()
+    held = deque()
+    seen = 0
+    in_references = False
+
+    def clean(page: Document) -> Document:
+        nonlocal in_references
+        lines = page.page_content.splitlines()
+        edges = _edge_lines(lines)
+        repeated = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_SHARE * seen)
+        total_pages = page.metadata.get("total_pages") or 0
+        late = page.metadata.get("page", 0) >= total_pages / 2
+
+        kept, removed = [], []
+        for i, line in enumerate(lines):
+            if strip_boilerplate and i in edges and counts[_line_key(line)] >= repeated:
+                stats.boilerplate_lines += 1
+                removed.append(line)
+                continue
+            if strip_references:
+                if late and _REFERENCES_HEADING.match(line):
+                    in_references = True
+                elif in_references and _AFTER_REFERENCES_HEADING.match(line):
+                    in_references = False
+                if in_references:
+                    stats.reference_lines += 1
+                    removed.append(line)
+                    continue
+            kept.append(line)
+
+        cleaned = "\n".join(kept)
+        if removed:
+            _estimate_savings(stats, page.page_content, cleaned, removed)
+        return Document(page_content=cleaned, metadata=page.metadata)
+
+    for page in pages:
+        seen += 1
+        lines = page.page_content.splitlines()
+        counts.update({_line_key(lines[i]) for i in _edge_lines(lines)})
+        held.append(page)
+        if seen >= BOILERPLATE_WINDOW:
+            while held:
+                yield clean(held.popleft())
+
+    while held:
+        yield clean(held.popleft())
+
+
+def _cleanup_enabled() -> bool:
+    return INGEST_STRIP_BOILERPLATE or INGEST_STRIP_REFERENCES
+
+
+def iter_chunk_records(pdf_path: str, document_id: UUID, stats: CleanupStats | None = None) -> Iterator[Dict]:
     """
+    Yields one record per chunk, reading the PDF a page at a time.
+    Chunks never span pages (the splitter runs per page, as before).
+    Pages are cleaned first (see clean_pages), unless both strips are off.
+    """
+    splitter = _splitter()
+    ordinal = 0
+
+    pages = iter_pages(pdf_path)
+    if _cleanup_enabled():
+        stats = stats if stats is not None else CleanupStats()
+        pages = clean_pages(pages, stats)
+    else:
+        # Nothing to compare against: counting chunks alone would report
+        # negative savings
+        stats = None
+
+    for page in pages:
+        for chunk in splitter.split_documents([page]):
+            chunk_id = uuid.uuid4()
+            page_number = chunk.metadata.get("page", -1)
+            char_start = chunk.metadata.get("start_index", -1)
 
-    # -------------------------
-    # Download PDF
-    # -------------------------
-    response = requests.get(pdf_url, timeout=60)
-    response.raise_for_status()
-
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-        tmp.write(response.content)
-        pdf_path = tmp.name
-
-    # -------------------------
-    # Load PDF
-    # -------------------------
-    pages = PyPDFLoader(pdf_path).load()
-
-    # -------------------------
-    # Split into chunks
-    # -------------------------
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=300,
+            token_count = count_tokens(chunk.page_content)
+            if stats is not None:
+                stats.chunks += 1
+                stats.tokens += token_count
+
+            yield {
+                "chunk_id": chunk_id,
+                "document_id": document_id,
+                "content": chunk.page_content,
+                "source": chunk.metadata.get("source", ""),
+                "page": page_number if page_number >= 0 else None,
+                "ordinal": ordinal,
+                "char_start": char_start if char_start >= 0 else None,
+                "char_end": char_start + len(chunk.page_content) if char_start >= 0 else None,
+                "token_count": token_count,
+                "content_hash": content_hash(chunk.page_content),
+            }
+            ordinal += 1
+
+
+def _index_metadata(record: Dict) -> Dict:
+    metadata = {
+        "document_id": str(record["document_id"]),
+        "chunk_id": str(record["chunk_id"]),
+        "source": record["source"],
+        "page": record["page"] if record["page"] is not None else -1,
+        "ordinal": record["ordinal"],
+    }
+    # Chroma metadata can't hold None: only near-duplicates carry the key
+    if record.get("dup_group") is not None:
+        metadata["dup_group"] = str(record["dup_group"])
+    return metadata
+
+
+def write_batch_to_indexes(batch: List[Dict], embeddings: List[List[float]], collection, es, index_name: str):
+    """
+    Writes one embedded batch to Chroma, then to Elasticsearch.
+    Both writers read from the records; no extra copies of the text are built.
+    """
+    # Same layout as langchain's Chroma.add_documents: text in `documents`
+    collection.upsert(
+        ids=[f"{r['document_id']}_{r['chunk_id']}" for r in batch],
+        embeddings=embeddings,
+        documents=[r["content"] for r in batch],
+        metadatas=[_index_metadata(r) for r in batch],
+    )
+
+    helpers.bulk(
+        es,
+        (
+            {
+                "_index": index_name,
+                "_id": str(r["chunk_id"]),
+                "_source": {"content": r["content"], **_index_metadata(r)},
+            }
+            for r in batch
+        ),
+        chunk_size=500,
+        request_timeout=120,
     )
-    chunks = splitter.split_documents(pages)
 
-    chroma = get_chroma()
+
+def _report_cleanup(document_id: UUID, stats: CleanupStats):
+    metrics.incr("ingest_cleanup.chunks_saved", stats.chunks_saved)
+    metrics.incr("ingest_cleanup.tokens_saved", stats.tokens_saved)
+    if stats.raw_chunks:
+        logger.info(
+            "document %s: cleanup saved %d of %d chunks and %d of %d embedding tokens "
+            "(%d boilerplate lines, %d reference lines)",
+            document_id, stats.chunks_saved, stats.raw_chunks, stats.tokens_saved, stats.raw_tokens,
+            stats.boilerplate_lines, stats.reference_lines,
+        )
+
+
+def ingest_pdf(
+    pdf_path: str,
+    document_id: UUID,
+    on_batch: Callable[[List[Dict]], None] | None = None,
+    batch_size: int = INGEST_BATCH_SIZE,
+    pipeline_depth: int = INGEST_PIPELINE_DEPTH,
+) -> int:
+    """
+    page -> clean -> split -> tag near-duplicates -> embed batch -> write batch
+    (Chroma, ES, then `on_batch`, the Postgres sink). Returns the number of
+    chunks written.
+
+    Pipelined: up to `pipeline_depth` batches are embedding on the executor
+    while the oldest one is written, in order.
+    """
+    collection = get_chroma_collection()
     es = get_es()
     index_name = get_index_name()
+    executor = get_embedding_executor()
 
-    chunk_records: List[Dict] = []
-    es_actions = []
-
-    # -------------------------
-    # Prepare chunks
-    # -------------------------
-    for chunk in chunks:
-        chunk_id = uuid.uuid4()
-        chroma_id = f"{document_id}_{chunk_id}"
-
-        metadata = {
-            "document_id": str(document_id),
-            "chunk_id": str(chunk_id),
-            "source": chunk.metadata.get("source", ""),
-            "page": chunk.metadata.get("page", -1),
-        }
-
-        chunk_records.append({
-            "chunk_id": chunk_id,
-            "document_id": document_id,
-            "content": chunk.page_content,
-            "chroma_id": chroma_id,
-            "metadata": metadata,
-        })
-
-        es_actions.append({
-            "_index": index_name,
-            "_id": str(chunk_id),
-            "_source": {
-                "content": chunk.page_content,
-                "document_id": str(document_id),
-                "chunk_id": str(chunk_id),
-                "source": metadata["source"],
-                "page": metadata["page"],
-            },
-        })
-
-    # -------------------------
-    # Ingest into Chroma
-    # -------------------------
-    chroma.add_documents(
-        documents=[
-            Document(
-                page_content=c["content"],
-                metadata=c["metadata"],
+    in_flight = deque()
+    total = 0
+
+    cleanup = CleanupStats() if _cleanup_enabled() else None
+    records = iter_chunk_records(pdf_path, document_id, stats=cleanup)
+    tagger = None
+    if NEAR_DUP_ENABLED:
+        tagger = NearDuplicateTagger()
+        records = map(tagger.tag, records)
+
+    def write_oldest():
+        nonlocal total
+        batch, job = in_flight.popleft()
+        write_batch_to_indexes(batch, job.result(), collection, es, index_name)
+        if on_batch is not None:
+            on_batch(batch)
+        total += len(batch)
+
+    try:
+        for batch in _batched(records, batch_size):
+            job = executor.submit(
+                [r["content"] for r in batch],
+                [r["token_count"] for r in batch],
+                [r["content_hash"] for r in batch],
             )
-            for c in chunk_records
-        ],
-        ids=[c["chroma_id"] for c in chunk_records],
-    )
+            in_flight.append((batch, job))
+            if len(in_flight) >= pipeline_depth:
+                write_oldest()
+        while in_flight:
+            write_oldest()
+    finally:
+        # On failure, don't spend tokens on batches that won't be written
+        for _, job in in_flight:
+            job.cancel()
+
+    if tagger is not None:
+        tagger.report(document_id)
+    if cleanup is not None:
+        _report_cleanup(document_id, cleanup)
+    return total
 
-    # -------------------------
-    # Ingest into Elasticsearch
-    # -------------------------
-    if es_actions:
-        helpers.bulk(
-            es,
-            es_actions,
-            chunk_size=500,
-            request_timeout=120,
-        )
 
-    return chunk_records
+def ingest_document_from_url(
+    document_id: UUID,
+    pdf_url: str,
+    on_batch: Callable[[List[Dict]], None] | None = None,
+) -> int:
+    """
+    Downloads a PDF (streamed to the spool directory, size-limited, removed
+    afterwards), splits into chunks, ingests into:
+    - Chroma (dense embeddings)
+    - Elasticsearch (BM25)
+    - `on_batch` (chunk rows for database persistence)
+    batch by batch. Returns the number of chunks.
+    """
+    with spooled_download(pdf_url) as pdf_path:
+        return ingest_pdf(pdf_path, document_id, on_batch=on_batch)
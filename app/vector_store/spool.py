@@ -0,0 +1,85 @@
+import os
+import time
+import logging
+import tempfile
+import requests
+from contextlib import contextmanager
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+# Downloads are spooled here and removed once parsed; anything left behind
+# (killed worker, OOM) is swept on worker startup.
+SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "rag-ingest-spool")
+MAX_DOWNLOAD_BYTES = int(os.getenv("INGEST_MAX_DOWNLOAD_BYTES", str(100 * 1024 * 1024)))
+# Files older than this are orphans: no ingest keeps its file that long
+ORPHAN_AGE_SECONDS = int(os.getenv("INGEST_SPOOL_ORPHAN_AGE", "900"))
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+SPOOL_SUFFIX = ".part"
+
+
+class DownloadTooLargeError(ValueError):
+    pass
+
+
+@contextmanager
+def spooled_download(url: str, max_bytes: int = MAX_DOWNLOAD_BYTES) -> Iterator[str]:
+    """
+    Streams `url` into the spool directory and yields the file path.
+    The file is removed on exit, including on errors and oversized downloads.
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=SPOOL_DIR, suffix=SPOOL_SUFFIX)
+
+    try:
+        with os.fdopen(fd, "wb") as out, requests.get(url, timeout=60, stream=True) as response:
+            response.raise_for_status()
+
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise DownloadTooLargeError(f"Download is {declared} bytes, limit is {max_bytes}")
+
+            written = 0
+            for block in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                written += len(block)
+                # Content-Length can be missing or wrong: enforce while streaming
+                if written > max_bytes:
+                    raise DownloadTooLargeError(f"Download exceeds the {max_bytes} bytes limit")
+                out.write(block)
+
+        yield path
+
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def sweep_spool(
+    max_age_seconds: int = ORPHAN_AGE_SECONDS,
+    directory: str = SPOOL_DIR,
+    suffix: str = SPOOL_SUFFIX,
+) -> int:
+    """
+    Removes `suffix` files in `directory` older than `max_age_seconds`.
+    Returns how many.
+    """
+    if not os.path.isdir(directory):
+        return 0
+
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(directory):
+        if not entry.is_file() or not entry.name.endswith(suffix):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+
+    if removed:
+        logger.info("Removed %d orphaned spool files from %s", removed, directory)
+    return removed
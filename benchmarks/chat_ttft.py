@@ -0,0 +1,74 @@
+"""
+Time-to-first-token of the SSE chat endpoint vs. latency of the blocking one.
+
+    python -m benchmarks.chat_ttft --token <jwt> --document-id <uuid> -n 10
+
+Questions are taken from rag/test.jsonl.
+"""
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import httpx
+from httpx_sse import connect_sse
+
+TEST_FILE = Path(__file__).resolve().parents[1] / "rag" / "test.jsonl"
+
+
+def load_questions(n: int) -> list[str]:
+    with open(TEST_FILE, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [r["question"] for r in rows[:n]]
+
+
+def blocking(client: httpx.Client, body: dict) -> float:
+    start = time.perf_counter()
+    client.post("/chat", json=body).raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+def streamed(client: httpx.Client, body: dict) -> tuple[float, float]:
+    start = time.perf_counter()
+    ttft = None
+    with connect_sse(client, "POST", "/chat/stream", json=body) as source:
+        source.response.raise_for_status()
+        for event in source.iter_sse():
+            if event.event == "token" and ttft is None:
+                ttft = (time.perf_counter() - start) * 1000
+            elif event.event == "error":
+                raise RuntimeError(event.data)
+    return ttft or float("nan"), (time.perf_counter() - start) * 1000
+
+
+def summary(name: str, samples: list[float]):
+    print(f"{name:<18} p50={statistics.median(samples):8.0f} ms  mean={statistics.mean(samples):8.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--document-id", action="append", required=True)
+    parser.add_argument("-n", type=int, default=10)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    blocking_ms, ttft_ms, stream_total_ms = [], [], []
+
+    with httpx.Client(base_url=args.base_url, headers=headers, timeout=120) as client:
+        for question in load_questions(args.n):
+            body = {"message": question, "document_ids": args.document_id}
+            blocking_ms.append(blocking(client, body))
+            ttft, total = streamed(client, body)
+            ttft_ms.append(ttft)
+            stream_total_ms.append(total)
+
+    summary("blocking total", blocking_ms)
+    summary("stream TTFT", ttft_ms)
+    summary("stream total", stream_total_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Chunks/sec of the ingestion EmbeddingExecutor (app/vector_store/
+embedding_executor) as concurrency grows, against the previous serial
+`embed_documents` call.
+
+The OpenAI API is replaced by a fake model that sleeps a fixed latency plus
+a per-token cost for each request, and optionally fails a fraction of them
+with a retryable error, so the numbers show the executor's scheduling only.
+
+    python -m benchmarks.embedding_throughput --chunks 2000 --concurrency 1,2,4,8
+    python -m benchmarks.embedding_throughput --failure-rate 0.05 --tpm 2000000
+"""
+import time
+import random
+import logging
+import argparse
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+from app.vector_store import embedding_executor
+from app.vector_store.embedding_executor import EmbeddingExecutor, TokenBucket
+
+
+class TransientError(Exception):
+    pass
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, latency: float, per_1k_tokens: float, failure_rate: float, dims: int = 1536):
+        self.latency = latency
+        self.per_1k_tokens = per_1k_tokens
+        self.failure_rate = failure_rate
+        self.dims = dims
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.failure_rate
+        tokens = sum(len(t) // 4 for t in texts)
+        time.sleep(self.latency + self.per_1k_tokens * tokens / 1000)
+        if fail:
+            raise TransientError("rate limited")
+        return [[0.0] * self.dims for _ in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def run(args, concurrency: int | None) -> tuple[float, int]:
+    model = FakeEmbeddings(args.latency, args.per_1k_tokens, args.failure_rate)
+    texts = ["x" * args.chunk_chars] * args.chunks
+    token_counts = [args.chunk_chars // 4] * args.chunks
+
+    start = time.perf_counter()
+    if concurrency is None:
+        # previous behaviour: one serial call, client-side batches of 1000
+        for i in range(0, len(texts), 1000):
+            model.embed_documents(texts[i:i + 1000])
+    else:
+        executor = EmbeddingExecutor(
+            model,
+            concurrency=concurrency,
+            budget=TokenBucket(args.tpm) if args.tpm else None,
+            retryable=(TransientError,),
+        )
+        executor.embed(texts, token_counts)
+        executor.pool.shutdown()
+    return time.perf_counter() - start, model.requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--per-1k-tokens", type=float, default=0.01, help="seconds per 1k tokens")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--tpm", type=int, default=0, help="tokens per minute, 0 = unlimited")
+    args = parser.parse_args()
+    embedding_executor.EMBED_BACKOFF_SECONDS = 0.05
+    logging.getLogger(embedding_executor.__name__).setLevel(logging.ERROR)
+
+    print(f"chunks={args.chunks} chunk_chars={args.chunk_chars} latency={args.latency}s failure_rate={args.failure_rate}")
+    modes = [None] + [int(c) for c in args.concurrency.split(",")]
+    for concurrency in modes:
+        seconds, requests = run(args, concurrency)
+        label = "serial" if concurrency is None else f"executor x{concurrency}"
+        print(f"{label:<13} {seconds:7.2f}s  {args.chunks / seconds:8.0f} chunks/s  requests={requests}")
+
+
+if __name__ == "__main__":
+    main()
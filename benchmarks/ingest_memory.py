@@ -0,0 +1,160 @@
+"""
+Peak memory of PDF ingestion: the streaming pipeline (app/vector_store/ingest:
+page -> split -> batch -> write) against the previous eager version (all
+pages, all chunks, then three copies of every chunk's text).
+
+A synthetic text PDF is generated locally. Chroma, Elasticsearch and
+Postgres are replaced by sinks that build the same write payloads and drop
+them, so only the pipeline's own memory is measured. Each run happens in a
+fresh subprocess and reports its peak RSS above the post-import baseline.
+
+    python -m benchmarks.ingest_memory --pages 2000
+    python -m benchmarks.ingest_memory --pages 250,1000,2000
+"""
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+import resource
+import subprocess
+import tempfile
+import uuid
+
+
+def write_synthetic_pdf(path: str, pages: int, chars_per_page: int = 3000, seed: int = 0):
+    """Minimal uncompressed PDF, one Helvetica text block per page."""
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10))) for _ in range(5000)]
+
+    offsets = []
+    with open(path, "wb") as f:
+        def obj(number: int, body: bytes):
+            offsets.append((number, f.tell()))
+            f.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        page_ids = [4 + 2 * i for i in range(pages)]
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{p} 0 R" for p in page_ids).encode()
+        obj(2, b"<< /Type /Pages /Kids [" + kids + b"] /Count " + str(pages).encode() + b" >>")
+        obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+        for page_id in page_ids:
+            text, lines = " ".join(rng.choices(words, k=chars_per_page // 6))[:chars_per_page], []
+            for start in range(0, len(text), 90):
+                line = text[start:start + 90].replace("\\", "").replace("(", "").replace(")", "")
+                lines.append(f"({line}) Tj 0 -12 Td")
+            stream = ("BT /F1 9 Tf 40 800 Td " + " ".join(lines) + " ET").encode()
+            obj(page_id, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+            ).encode())
+            obj(page_id + 1, b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+
+        xref = f.tell()
+        count = len(offsets) + 1
+        f.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode())
+        for _, offset in sorted(offsets):
+            f.write(f"{offset:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_streaming(pdf_path: str) -> int:
+    from app.vector_store import ingest
+
+    class NullCollection:
+        def upsert(self, ids, embeddings, documents, metadatas):
+            return ids
+
+    def null_bulk(es, actions, **kwargs):
+        for _ in actions:
+            pass
+
+    ingest.helpers.bulk = null_bulk  # ES payloads are still built, just not sent
+    total = 0
+    for batch in ingest._batched(ingest.iter_chunk_records(pdf_path, uuid.uuid4()), ingest.INGEST_BATCH_SIZE):
+        # embeddings are not part of either measurement
+        ingest.write_batch_to_indexes(batch, [[0.0]] * len(batch), NullCollection(), None, "bench")
+        total += len(batch)
+    return total
+
+
+def run_eager(pdf_path: str) -> int:
+    """The previous ingest_document_from_url, minus the network writes."""
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain_core.documents import Document
+    from app.vector_store.ingest import _splitter
+
+    pages = PyPDFLoader(pdf_path).load()
+    chunks = _splitter().split_documents(pages)
+    document_id = uuid.uuid4()
+
+    chunk_records, es_actions = [], []
+    for chunk in chunks:
+        chunk_id = uuid.uuid4()
+        metadata = {
+            "document_id": str(document_id),
+            "chunk_id": str(chunk_id),
+            "source": chunk.metadata.get("source", ""),
+            "page": chunk.metadata.get("page", -1),
+        }
+        chunk_records.append({"chunk_id": chunk_id, "content": chunk.page_content, "metadata": metadata})
+        es_actions.append({"_id": str(chunk_id), "_source": {"content": chunk.page_content, **metadata}})
+
+    chroma_documents = [Document(page_content=c["content"], metadata=c["metadata"]) for c in chunk_records]
+    return len(chroma_documents)
+
+
+def child(mode: str, pdf_path: str):
+    import app.vector_store.ingest  # noqa: F401  imports count towards the baseline
+    import langchain_community.document_loaders  # noqa: F401
+    baseline = _peak_rss_mb()
+
+    start = time.perf_counter()
+    chunks = (run_streaming if mode == "streaming" else run_eager)(pdf_path)
+    print(json.dumps({
+        "chunks": chunks,
+        "seconds": time.perf_counter() - start,
+        "peak_mb": _peak_rss_mb() - baseline,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", default="2000", help="comma-separated page counts")
+    parser.add_argument("--chars-per-page", type=int, default=3000)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in (int(p) for p in args.pages.split(",")):
+            pdf_path = os.path.join(tmp, f"synthetic_{pages}.pdf")
+            write_synthetic_pdf(pdf_path, pages, args.chars_per_page)
+            size_mb = os.path.getsize(pdf_path) / 1024 / 1024
+
+            for mode in ("eager", "streaming"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.ingest_memory", "--child", mode, pdf_path],
+                    capture_output=True, text=True, check=True,
+                )
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                print(
+                    f"pages={pages:<5} pdf={size_mb:5.1f} MB  {mode:<9} chunks={result['chunks']:<6} "
+                    f"peak=+{result['peak_mb']:6.1f} MB  time={result['seconds']:6.1f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Concurrent chat load test against a single API worker.
+
+Opens `--concurrency` streamed chats at once and tracks how many are in
+flight on the server at the same time (meta event received, done not yet),
+plus latency percentiles.
+
+    uvicorn main:app --workers 1
+    python -m benchmarks.load_test_chat --token <jwt> --document-id <uuid> --concurrency 500
+"""
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import httpx
+
+TEST_FILE = Path(__file__).resolve().parents[1] / "rag" / "test.jsonl"
+
+
+class InFlight:
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    def enter(self):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        self.current -= 1
+
+
+async def one_chat(client, body, in_flight: InFlight, latencies: list, errors: list):
+    start = time.perf_counter()
+    entered = False
+    try:
+        async with client.stream("POST", "/chat/stream", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line == "event: meta":
+                    in_flight.enter()
+                    entered = True
+                elif line == "event: error":
+                    errors.append("error event")
+        latencies.append((time.perf_counter() - start) * 1000)
+    except Exception as e:
+        errors.append(repr(e))
+    finally:
+        if entered:
+            in_flight.exit()
+
+
+async def run(args):
+    with open(TEST_FILE, "r", encoding="utf-8") as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Authorization": f"Bearer {args.token}"}
+    in_flight, latencies, errors = InFlight(), [], []
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, headers=headers, limits=limits, timeout=300
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            one_chat(
+                client,
+                {"message": questions[i % len(questions)], "document_ids": args.document_id},
+                in_flight,
+                latencies,
+                errors,
+            )
+            for i in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies) or [float("nan")]
+    print(f"requests={args.concurrency} ok={len(latencies)} errors={len(errors)} wall={elapsed:.1f}s")
+    print(f"peak in-flight on server: {in_flight.peak}")
+    print(
+        f"latency p50={statistics.median(ordered):.0f} ms "
+        f"p95={ordered[max(0, int(len(ordered) * 0.95) - 1)]:.0f} ms "
+        f"max={ordered[-1]:.0f} ms"
+    )
+    for error in errors[:5]:
+        print("  ", error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--document-id", action="append", required=True)
+    parser.add_argument("--concurrency", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
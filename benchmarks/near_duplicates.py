@@ -0,0 +1,83 @@
+"""
+Near-duplicate suppression on a PDF corpus (rag/near_duplicates):
+
+- index: share of chunks tagged as near-duplicates at write time, per
+  document and overall (index entries the query-time filter can collapse);
+- rerank: candidates removed by NearDuplicateFilter before the reranker,
+  for queries sampled from the corpus. Candidates come from a simple
+  word-overlap ranking over all chunks, standing in for hybrid retrieval.
+
+Chunking is the ingestion one (app/vector_store/ingest); nothing is embedded
+or written.
+
+    python -m benchmarks.near_duplicates --pdf-dir data/papers --queries 200
+"""
+import os
+import re
+import glob
+import uuid
+import random
+import argparse
+from collections import Counter
+
+from langchain_core.documents import Document
+
+from app.vector_store.ingest import iter_chunk_records
+from rag.near_duplicates import NearDuplicateFilter, NearDuplicateTagger
+
+_WORD = re.compile(r"\w+")
+
+
+def load_corpus(pdf_dir: str, limit: int | None) -> list[Document]:
+    docs = []
+    total_chunks = total_duplicates = 0
+    for path in sorted(glob.glob(os.path.join(pdf_dir, "*.pdf")))[:limit]:
+        tagger = NearDuplicateTagger()
+        for record in map(tagger.tag, iter_chunk_records(path, uuid.uuid4())):
+            metadata = {"chunk_id": str(record["chunk_id"])}
+            if record["dup_group"] is not None:
+                metadata["dup_group"] = str(record["dup_group"])
+            docs.append(Document(page_content=record["content"], metadata=metadata))
+        total_chunks += tagger.chunks
+        total_duplicates += tagger.duplicates
+        print(f"{tagger.duplicates:5d} / {tagger.chunks:5d} near-duplicate  {os.path.basename(path)[:70]}")
+
+    print(f"\nindex: {total_duplicates} of {total_chunks} chunks are near-duplicates "
+          f"({100 * total_duplicates / max(total_chunks, 1):.1f}% of the index entries)")
+    return docs
+
+
+def top_candidates(query: str, docs: list[Document], bags: list[Counter], k: int) -> list[Document]:
+    terms = set(_WORD.findall(query.lower()))
+    scores = [sum(bag[t] for t in terms) for bag in bags]
+    ranked = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+    return [docs[i] for i in ranked[:k]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pdf-dir", default="data/papers")
+    parser.add_argument("--limit", type=int, default=None, help="number of PDFs")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=20, help="candidates sent to the reranker")
+    args = parser.parse_args()
+
+    docs = load_corpus(args.pdf_dir, args.limit)
+    bags = [Counter(_WORD.findall(d.page_content.lower())) for d in docs]
+
+    rng = random.Random(0)
+    flt = NearDuplicateFilter()
+    before = after = 0
+    for _ in range(args.queries):
+        words = rng.choice(docs).page_content.split()
+        start = rng.randrange(max(1, len(words) - 12))
+        candidates = top_candidates(" ".join(words[start:start + 12]), docs, bags, args.k)
+        before += len(candidates)
+        after += len(flt.compress_documents(candidates, ""))
+
+    print(f"rerank: {before} candidates -> {after} after collapsing "
+          f"({100 * (before - after) / max(before, 1):.1f}% smaller payload, {args.queries} queries, k={args.k})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Retrieval query size for follow-up turns: raw message vs. the old
+"all prior user messages + question" query (rag/answer.combined_question)
+vs. the condensed standalone query (rag/query_condenser).
+
+Conversations are built from consecutive rag/test.jsonl questions, each
+followed by a generic follow-up. Also reports how many turns the heuristic
+gate lets through without an LLM call, and condenser cache hits when the
+same turns are replayed.
+
+    python -m benchmarks.query_condenser -n 20 --turns 6
+    python -m benchmarks.query_condenser --skip-llm     # gate + sizes only
+"""
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from rag.context_packer import count_tokens
+from rag.metrics import metrics
+from rag.query_condenser import condense_query, needs_condensation
+
+TEST_FILE = Path(__file__).resolve().parents[1] / "rag" / "test.jsonl"
+
+FOLLOW_UPS = [
+    "Can you elaborate on that?",
+    "How does it compare to the baseline?",
+    "What datasets were they evaluated on?",
+    "Why does this work better?",
+    "And the limitations?",
+]
+
+
+def load_questions() -> list[str]:
+    with open(TEST_FILE, "r", encoding="utf-8") as f:
+        return [json.loads(line)["question"] for line in f if line.strip()]
+
+
+def build_conversation(questions: list[str], start: int, turns: int) -> list[str]:
+    """Alternates a test question and a follow-up referring back to it."""
+    messages = []
+    for i in range(turns):
+        if i % 2 == 0:
+            messages.append(questions[(start + i // 2) % len(questions)])
+        else:
+            messages.append(FOLLOW_UPS[(start + i) % len(FOLLOW_UPS)])
+    return messages
+
+
+def combined_question(question: str, history: list[dict]) -> str:
+    prior = "\n".join(m["content"] for m in history if m["role"] == "user")
+    return prior + "\n" + question
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=20, help="number of conversations")
+    parser.add_argument("--turns", type=int, default=6, help="user turns per conversation")
+    parser.add_argument("--skip-llm", action="store_true", help="no rewrite calls, heuristic gate only")
+    args = parser.parse_args()
+
+    questions = load_questions()
+    raw, combined, condensed, latencies_ms = [], [], [], []
+    gated = total = 0
+
+    for conversation in range(args.n):
+        history = []
+        for turn, message in enumerate(build_conversation(questions, conversation, args.turns)):
+            if history:
+                total += 1
+                gated += needs_condensation(message, history)
+                raw.append(count_tokens(message))
+                combined.append(count_tokens(combined_question(message, history)))
+
+                if not args.skip_llm:
+                    start = time.perf_counter()
+                    query = condense_query(message, history, chat_id=f"bench-{conversation}", turn=turn)
+                    latencies_ms.append((time.perf_counter() - start) * 1000)
+                    condensed.append(count_tokens(query))
+
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": "(answer)"})
+
+    print(f"follow-up turns={total}  sent to rewriter={gated / total:.1%}")
+    print(f"raw message       mean={statistics.mean(raw):7.1f} tokens  max={max(raw)}")
+    print(f"combined (old)    mean={statistics.mean(combined):7.1f} tokens  max={max(combined)}")
+    if args.skip_llm:
+        return
+
+    print(f"condensed         mean={statistics.mean(condensed):7.1f} tokens  max={max(condensed)}")
+    print(
+        f"condense latency  p50={statistics.median(latencies_ms):.0f} ms  "
+        f"mean={statistics.mean(latencies_ms):.0f} ms (incl. skipped turns)"
+    )
+
+    # Replay: retried / re-sent turns hit the (chat_id, turn) cache
+    before = metrics.get("query_condenser.cache_hit")
+    for conversation in range(args.n):
+        history = []
+        for turn, message in enumerate(build_conversation(questions, conversation, args.turns)):
+            if history:
+                condense_query(message, history, chat_id=f"bench-{conversation}", turn=turn)
+            history.append({"role": "user", "content": message})
+            history.append({"role": "assistant", "content": "(answer)"})
+    print(f"replay cache hits={metrics.get('query_condenser.cache_hit') - before}/{gated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Per-request retriever setup cost: legacy build vs. shared RetrievalEngine.
+
+Needs the Chroma and Elasticsearch services from docker-compose, no queries
+are sent (only client construction / scoping is timed).
+
+    python -m benchmarks.retriever_setup --iterations 50
+"""
+import os
+import time
+import argparse
+import statistics
+
+import chromadb
+from dotenv import load_dotenv
+from elasticsearch import Elasticsearch
+from langchain_chroma import Chroma
+from langchain_openai.embeddings import OpenAIEmbeddings
+from langchain_classic.retrievers import EnsembleRetriever
+from langchain_community.retrievers import ElasticSearchBM25Retriever
+from langchain_classic.retrievers import ContextualCompressionRetriever
+
+from rag.engine import RetrievalEngine
+from rag.reranker import modal_reranker
+
+load_dotenv(override=True)
+
+
+def legacy_build_retriever(document_ids: list[str]):
+    """
+    The pre-engine `build_retriever`: new embeddings, Chroma and ES clients per call.
+    """
+    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+
+    client = chromadb.HttpClient(
+        host=os.getenv("CHROMA_SERVER_HOST", "rag_chroma"),
+        port=int(os.getenv("CHROMA_SERVER_PORT", "8000")),
+    )
+    client.heartbeat()
+    dense = Chroma(
+        client=client,
+        embedding_function=embeddings,
+        collection_name="rag_collection",
+    ).as_retriever(
+        search_kwargs={"k": 10, "filter": {"document_id": {"$in": document_ids}}}
+    )
+
+    es = Elasticsearch(hosts=os.getenv("ELASTIC_URL", "http://localhost:9200"))
+    es.info()  # force the connection the first search would otherwise open
+    sparse = ElasticSearchBM25Retriever(client=es, index_name="research-papers")
+
+    ensemble = EnsembleRetriever(retrievers=[dense, sparse], weights=[0.6, 0.4])
+    return ContextualCompressionRetriever(
+        base_retriever=ensemble,
+        base_compressor=modal_reranker,
+    )
+
+
+def timed(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name: str, samples: list[float]):
+    ordered = sorted(samples)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{name:<10} mean={statistics.mean(samples):8.3f} ms  "
+        f"p50={statistics.median(samples):8.3f} ms  p95={p95:8.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    document_ids = ["00000000-0000-0000-0000-000000000000"]
+
+    legacy = timed(lambda: legacy_build_retriever(document_ids), args.iterations)
+
+    engine_start = time.perf_counter()
+    engine = RetrievalEngine()
+    engine_init_ms = (time.perf_counter() - engine_start) * 1000
+    shared = timed(lambda: engine.as_retriever(document_ids), args.iterations)
+
+    print(f"iterations={args.iterations}  one-off engine init={engine_init_ms:.1f} ms")
+    report("legacy", legacy)
+    report("engine", shared)
+    print(f"speedup (mean): {statistics.mean(legacy) / statistics.mean(shared):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Extractive vs. LLM chat titles on the rag/test.jsonl questions.
+
+Latency is measured per title. Quality is approximated with the reference
+keywords of each test question (share of titles that contain at least one
+keyword, mean keyword recall), the <= 6 words constraint, and word overlap
+between the two generators.
+
+    python -m benchmarks.title_generators -n 50
+    python -m benchmarks.title_generators --skip-llm      # no API calls
+"""
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from rag.extractive_title import extractive_title
+from rag.title_generator import MAX_TITLE_WORDS, llm_chat_title
+
+TEST_FILE = Path(__file__).resolve().parents[1] / "rag" / "test.jsonl"
+
+
+def load_tests(n: int | None) -> list[dict]:
+    with open(TEST_FILE, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return rows[:n] if n else rows
+
+
+def keyword_recall(title: str, keywords: list[str]) -> float:
+    lowered = title.lower()
+    return sum(k.lower() in lowered for k in keywords) / len(keywords) if keywords else 0.0
+
+
+def jaccard(a: str, b: str) -> float:
+    sa, sb = set(a.lower().split()), set(b.lower().split())
+    return len(sa & sb) / len(sa | sb) if sa | sb else 0.0
+
+
+def evaluate(name: str, generate, tests: list[dict]) -> list[str]:
+    titles, latencies_ms = [], []
+    for test in tests:
+        start = time.perf_counter()
+        titles.append(generate(test["question"]))
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    recalls = [keyword_recall(t, test["keywords"]) for t, test in zip(titles, tests)]
+    within_limit = sum(len(t.split()) <= MAX_TITLE_WORDS for t in titles) / len(titles)
+
+    print(
+        f"{name:<11} p50={statistics.median(latencies_ms):9.3f} ms  "
+        f"mean={statistics.mean(latencies_ms):9.3f} ms  "
+        f"has_keyword={sum(r > 0 for r in recalls) / len(recalls):6.1%}  "
+        f"keyword_recall={statistics.mean(recalls):6.1%}  "
+        f"<= {MAX_TITLE_WORDS} words={within_limit:6.1%}"
+    )
+    return titles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=None, help="number of questions (default: all)")
+    parser.add_argument("--skip-llm", action="store_true")
+    parser.add_argument("--show", type=int, default=10, help="print the first N titles side by side")
+    args = parser.parse_args()
+
+    tests = load_tests(args.n)
+    print(f"questions={len(tests)}")
+
+    extractive = evaluate("extractive", extractive_title, tests)
+    if args.skip_llm:
+        llm = None
+    else:
+        llm = evaluate("llm", llm_chat_title, tests)
+        overlap = statistics.mean(jaccard(a, b) for a, b in zip(extractive, llm))
+        print(f"word overlap extractive/llm (Jaccard): {overlap:.2f}")
+
+    for i, test in enumerate(tests[: args.show]):
+        print(f"\nQ: {test['question']}\n  extractive: {extractive[i]}")
+        if llm:
+            print(f"  llm:        {llm[i]}")
+
+
+if __name__ == "__main__":
+    main()
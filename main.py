@@ -6,19 +6,31 @@ from app.utils.protected_route import get_current_user
 from app.router.auth import auth_router
 from app.router.chat import chat_router
 from app.router.document import document_router
+from app.router.chunk import chunk_router
 from app.router.chat import chat_router
 from app.schemas.user import UserOutput
+from rag.engine import init_retrieval_engine, shutdown_retrieval_engine
+from rag.retrieval_router import init_retrieval_router
+from rag.metrics import metrics
 
 @asynccontextmanager
 async def lifespan(app:FastAPI):
     create_tables()
+    app.state.retrieval_engine = init_retrieval_engine()
+    init_retrieval_router()
     yield
+    shutdown_retrieval_engine()
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(router=auth_router, tags=["auth"], prefix="/auth")
 app.include_router(router =chat_router, tags=["chat"])
 app.include_router(router = document_router, tags = ['document'], prefix="/documents")
 app.include_router(router = chat_router, tags = ["chat"], prefix = "/chat")
+app.include_router(router = chunk_router, tags = ["chunks"], prefix = "/chunks")
 @app.get("/health")
 def health():
     return {"status": "Healthy"}
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
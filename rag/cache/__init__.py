@@ -0,0 +1,6 @@
+from .lru import TTLCache
+from .keys import make_key, normalize_query
+from .embeddings import CachedQueryEmbeddings
+from .retrieval import CachedRetriever, RetrievalResultCache, bump_document_generation
+from .semantic import CachedAnswer, SemanticAnswerCache
+from .embedding_store import EmbeddingStore, StoredEmbeddings, content_hash
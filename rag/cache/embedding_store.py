@@ -0,0 +1,182 @@
+import os
+import logging
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+
+from redis import RedisError
+from langchain_core.embeddings import Embeddings
+
+from app.core.redis_client import get_redis
+from rag.cache.embeddings import _pack, _unpack
+from rag.cache.keys import make_key
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Local tier, one file per host; the Redis tier is shared by every worker
+EMBEDDING_STORE_PATH = os.getenv(
+    "EMBEDDING_STORE_PATH",
+    os.path.join(PROJECT_ROOT, "data", "embedding_store.sqlite3"),
+)
+EMBEDDING_STORE_REDIS_TTL = int(os.getenv("EMBEDDING_STORE_REDIS_TTL", str(30 * 24 * 3600)))
+# Redis round trips are batched
+REDIS_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    """Same hash as the `content_hash` of chunk rows."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Persistent document embeddings keyed by (model, sha256 of the exact text):
+    a local SQLite file in front of Redis. Vectors never expire locally, so
+    re-ingesting or reindexing unchanged text needs no embedding call.
+
+    Either tier failing degrades to the other (or to a miss), never to an error.
+    """
+
+    def __init__(self, model: str, path: str | None = EMBEDDING_STORE_PATH, redis_client=None, redis_ttl: int = EMBEDDING_STORE_REDIS_TTL):
+        self.model = model
+        self.path = path
+        self.redis = redis_client if redis_client is not None else get_redis()
+        self.redis_ttl = redis_ttl
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _local(self) -> sqlite3.Connection | None:
+        if self.path is None:
+            return None
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            # Several worker processes may share the file
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, hash))"
+            )
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _redis_key(self, digest: str) -> str:
+        return make_key(f"embstore:{self.model}", digest)
+
+    def _local_get(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        try:
+            with self._lock:
+                db = self._local()
+                if db is None:
+                    return found
+                for start in range(0, len(hashes), 500):
+                    page = hashes[start:start + 500]
+                    rows = db.execute(
+                        f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(page))})",
+                        [self.model, *page],
+                    )
+                    found.update((digest, _unpack(raw)) for digest, raw in rows)
+        except sqlite3.Error:
+            logger.warning("Embedding store: local read failed", exc_info=True)
+        return found
+
+    def _local_put(self, vectors: Dict[str, List[float]]):
+        try:
+            with self._lock:
+                db = self._local()
+                if db is None:
+                    return
+                db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                    [(self.model, digest, _pack(vector)) for digest, vector in vectors.items()],
+                )
+                db.commit()
+        except sqlite3.Error:
+            logger.warning("Embedding store: local write failed", exc_info=True)
+
+    def _redis_get(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        if self.redis is None:
+            return found
+        try:
+            for start in range(0, len(hashes), REDIS_BATCH):
+                page = hashes[start:start + REDIS_BATCH]
+                for digest, raw in zip(page, self.redis.mget([self._redis_key(h) for h in page])):
+                    if raw:
+                        found[digest] = _unpack(raw)
+        except RedisError:
+            logger.warning("Embedding store: Redis get failed", exc_info=True)
+        return found
+
+    def _redis_put(self, vectors: Dict[str, List[float]]):
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for digest, vector in vectors.items():
+                pipe.set(self._redis_key(digest), _pack(vector), ex=self.redis_ttl)
+            pipe.execute()
+        except RedisError:
+            logger.warning("Embedding store: Redis set failed", exc_info=True)
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        hashes = list(dict.fromkeys(hashes))
+        found = self._local_get(hashes)
+        metrics.incr("embedding_store.local_hit", len(found))
+
+        missing = [h for h in hashes if h not in found]
+        if missing:
+            shared = self._redis_get(missing)
+            if shared:
+                metrics.incr("embedding_store.shared_hit", len(shared))
+                self._local_put(shared)
+                found.update(shared)
+            metrics.incr("embedding_store.miss", len(missing) - len(shared))
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        if not vectors:
+            return
+        self._local_put(vectors)
+        self._redis_put(vectors)
+
+    def stats(self) -> dict:
+        return {
+            "local_hit": metrics.get("embedding_store.local_hit"),
+            "shared_hit": metrics.get("embedding_store.shared_hit"),
+            "miss": metrics.get("embedding_store.miss"),
+        }
+
+
+class StoredEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model so `embed_documents` only sends texts that are
+    not in the EmbeddingStore yet. Queries are passed through.
+    """
+
+    def __init__(self, underlying: Embeddings, store: EmbeddingStore):
+        self.underlying = underlying
+        self.store = store
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash(t) for t in texts]
+        found = self.store.get_many(hashes)
+
+        missing = list(dict.fromkeys(h for h in hashes if h not in found))
+        if missing:
+            text_by_hash = dict(zip(hashes, texts))
+            vectors = self.underlying.embed_documents([text_by_hash[h] for h in missing])
+            computed = dict(zip(missing, vectors))
+            self.store.put_many(computed)
+            found.update(computed)
+
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
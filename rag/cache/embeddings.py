@@ -0,0 +1,103 @@
+import os
+import logging
+from array import array
+
+from redis import RedisError
+from langchain_core.embeddings import Embeddings
+
+from app.core.redis_client import get_redis
+from rag.cache.keys import make_key, normalize_query
+from rag.cache.lru import TTLCache
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+LRU_TTL = float(os.getenv("EMBEDDING_CACHE_LRU_TTL", "3600"))
+REDIS_TTL = int(os.getenv("EMBEDDING_CACHE_REDIS_TTL", str(7 * 24 * 3600)))
+
+
+def _pack(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(raw: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(raw)
+    return vector.tolist()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model with a two-tier cache for query embeddings:
+    a bounded in-process LRU in front of Redis.
+
+    Keys are (model name, normalized query text). Document embeddings are
+    passed through untouched. A Redis outage degrades to LRU-only.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model: str,
+        redis_client=None,
+        lru: TTLCache | None = None,
+        redis_ttl: int = REDIS_TTL,
+    ):
+        self.underlying = underlying
+        self.model = model
+        self.redis = redis_client if redis_client is not None else get_redis()
+        self.lru = lru or TTLCache(maxsize=LRU_SIZE, ttl=LRU_TTL)
+        self.redis_ttl = redis_ttl
+
+    def _key(self, text: str) -> str:
+        return make_key(f"emb:{self.model}", normalize_query(text))
+
+    def _redis_get(self, key: str) -> list[float] | None:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(key)
+        except RedisError:
+            logger.warning("Embedding cache: Redis get failed", exc_info=True)
+            return None
+        return _unpack(raw) if raw else None
+
+    def _redis_set(self, key: str, vector: list[float]):
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(key, _pack(vector), ex=self.redis_ttl)
+        except RedisError:
+            logger.warning("Embedding cache: Redis set failed", exc_info=True)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+
+        vector = self.lru.get(key)
+        if vector is not None:
+            metrics.incr("embedding_cache.lru_hit")
+            return vector
+
+        vector = self._redis_get(key)
+        if vector is not None:
+            metrics.incr("embedding_cache.redis_hit")
+            self.lru.set(key, vector)
+            return vector
+
+        metrics.incr("embedding_cache.miss")
+        vector = self.underlying.embed_query(text)
+        self.lru.set(key, vector)
+        self._redis_set(key, vector)
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.underlying.embed_documents(texts)
+
+    def stats(self) -> dict:
+        return {
+            "lru_hit": metrics.get("embedding_cache.lru_hit"),
+            "redis_hit": metrics.get("embedding_cache.redis_hit"),
+            "miss": metrics.get("embedding_cache.miss"),
+            "lru_size": len(self.lru),
+        }
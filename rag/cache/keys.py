@@ -0,0 +1,19 @@
+import re
+import hashlib
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    Case- and whitespace-insensitive form of a query, used for cache keys only.
+    """
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def make_key(namespace: str, *parts: str) -> str:
+    """
+    Builds a fixed-length Redis key: `<namespace>:<sha256 of parts>`.
+    """
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
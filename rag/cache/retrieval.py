@@ -0,0 +1,155 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any
+
+from redis import RedisError
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.core.redis_client import get_redis
+from rag.cache.keys import make_key, normalize_query
+from rag.fusion import PARTIAL_RESULT_KEY
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+GENERATION_PREFIX = "docgen"
+
+
+def _generation_key(document_id: str) -> str:
+    return f"{GENERATION_PREFIX}:{document_id}"
+
+
+def bump_document_generation(document_id, redis_client=None):
+    """
+    Invalidates every cached retrieval that includes `document_id`.
+
+    Cache keys embed the generation of each document in scope, so bumping the
+    counter makes old entries unreachable (they expire on their TTL) without
+    scanning keys. Called when ingestion finishes and when a document is deleted.
+    """
+    client = redis_client if redis_client is not None else get_redis()
+    if client is None:
+        return
+    try:
+        client.incr(_generation_key(str(document_id)))
+    except RedisError:
+        logger.warning("Failed to bump generation for document %s", document_id, exc_info=True)
+
+
+def document_scope(document_ids: list[str], redis_client) -> str:
+    """
+    Canonical `id@generation,...` string for a document set; changes whenever
+    one of the documents is re-ingested or deleted.
+    """
+    ids = sorted(str(d) for d in document_ids)
+    generations = redis_client.mget([_generation_key(d) for d in ids])
+    return ",".join(
+        f"{d}@{int(g) if g else 0}" for d, g in zip(ids, generations)
+    )
+
+
+class RetrievalResultCache:
+    """
+    Redis-backed cache of final (fused + reranked) chunk lists, keyed by
+    normalized query, sorted document ids with their generations and the
+    retriever config version.
+    """
+
+    def __init__(self, redis_client, ttl: int = RETRIEVAL_CACHE_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+
+    def key(self, query: str, document_ids: list[str], config_version: str) -> str:
+        scope = document_scope(document_ids, self.redis)
+        return make_key("ret", config_version, scope, normalize_query(query))
+
+    def get(self, key: str) -> list[Document] | None:
+        raw = self.redis.get(key)
+        if raw is None:
+            return None
+        return [
+            Document(page_content=d["page_content"], metadata=d["metadata"])
+            for d in json.loads(raw)
+        ]
+
+    def set(self, key: str, docs: list[Document]):
+        payload = json.dumps(
+            [{"page_content": d.page_content, "metadata": d.metadata} for d in docs],
+            default=str,
+        )
+        self.redis.set(key, payload, ex=self.ttl)
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Serves repeated (query, document set) lookups from RetrievalResultCache,
+    skipping dense search, BM25 and the rerank call. Cache errors fall back to
+    the wrapped retriever.
+    """
+
+    base: BaseRetriever
+    cache: Any
+    document_ids: list[str]
+    config_version: str
+
+    def _lookup(self, query: str) -> tuple[str | None, list[Document] | None]:
+        try:
+            key = self.cache.key(query, self.document_ids, self.config_version)
+            return key, self.cache.get(key)
+        except RedisError:
+            logger.warning("Retrieval cache lookup failed", exc_info=True)
+            return None, None
+
+    def _store(self, key: str | None, docs: list[Document]):
+        # A result missing a backend (timeout, error) is served once, not
+        # cached for the TTL; an empty one is most likely degraded too
+        partial = [d.metadata.pop(PARTIAL_RESULT_KEY, False) for d in docs]
+        if key is None or not docs or any(partial):
+            if any(partial):
+                metrics.incr("retrieval_cache.partial_skipped")
+            return
+        try:
+            self.cache.set(key, docs)
+        except RedisError:
+            logger.warning("Retrieval cache store failed", exc_info=True)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        key, docs = self._lookup(query)
+        if docs is not None:
+            metrics.incr("retrieval_cache.hit")
+            return docs
+
+        metrics.incr("retrieval_cache.miss")
+        docs = self.base.invoke(query, config={"callbacks": run_manager.get_child()})
+        self._store(key, docs)
+        return docs
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        # Redis calls are blocking: keep them off the event loop
+        key, docs = await asyncio.to_thread(self._lookup, query)
+        if docs is not None:
+            metrics.incr("retrieval_cache.hit")
+            return docs
+
+        metrics.incr("retrieval_cache.miss")
+        docs = await self.base.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        await asyncio.to_thread(self._store, key, docs)
+        return docs
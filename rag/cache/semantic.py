@@ -0,0 +1,179 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+from redis import RedisError
+
+from app.core.redis_client import get_redis
+from rag.cache.retrieval import document_scope
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_ENTRIES_PER_SCOPE = int(os.getenv("SEMANTIC_CACHE_ENTRIES_PER_SCOPE", "256"))
+SEMANTIC_CACHE_MAX_SCOPES = int(os.getenv("SEMANTIC_CACHE_MAX_SCOPES", "1024"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    # page_content and metadata of the chunks the answer was generated from
+    sources: list[dict]
+    created_at: float = field(default_factory=time.monotonic)
+    last_hit_at: float | None = None
+    hits: int = 0
+
+
+class _ScopeIndex:
+    """
+    Answers for one document set: a (n, dim) float32 matrix of unit question
+    vectors, row-aligned with `entries`.
+    """
+
+    def __init__(self, dim: int):
+        self.matrix = np.empty((0, dim), dtype=np.float32)
+        self.entries: list[CachedAnswer] = []
+
+    def remove(self, i: int):
+        self.matrix = np.delete(self.matrix, i, axis=0)
+        del self.entries[i]
+
+    def add(self, vector: np.ndarray, entry: CachedAnswer):
+        self.matrix = np.vstack([self.matrix, vector[None, :]])
+        self.entries.append(entry)
+
+
+class SemanticAnswerCache:
+    """
+    In-process cache of full RAG answers, matched by cosine similarity of the
+    question embedding within the same document set.
+
+    Scopes (document sets) and the entries inside a scope are both evicted
+    least-recently-used; entries also expire after `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        entries_per_scope: int = SEMANTIC_CACHE_ENTRIES_PER_SCOPE,
+        max_scopes: int = SEMANTIC_CACHE_MAX_SCOPES,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        redis_client=None,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.entries_per_scope = entries_per_scope
+        self.max_scopes = max_scopes
+        self.ttl = ttl
+        self.redis = redis_client if redis_client is not None else get_redis()
+        self._scopes: OrderedDict[str, _ScopeIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scope_key(self, document_ids: list[str]) -> str:
+        # Generations make answers over a re-ingested / deleted document unreachable
+        if self.redis is not None:
+            try:
+                return document_scope(document_ids, self.redis)
+            except RedisError:
+                logger.warning("Semantic cache: generation lookup failed", exc_info=True)
+        return ",".join(sorted(str(d) for d in document_ids))
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(
+        self,
+        question: str,
+        document_ids: list[str],
+    ) -> tuple[CachedAnswer | None, np.ndarray]:
+        """
+        Returns the closest cached answer above the threshold (or None) and the
+        question vector, so a miss can be stored without embedding twice.
+        """
+        vector = self._embed(question)
+        scope_key = self._scope_key(document_ids)
+        now = time.monotonic()
+
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is None or not scope.entries:
+                metrics.incr("semantic_cache.miss")
+                return None, vector
+
+            self._scopes.move_to_end(scope_key)
+
+            expired = [
+                i for i, e in enumerate(scope.entries)
+                if now - e.created_at > self.ttl
+            ]
+            for i in reversed(expired):
+                scope.remove(i)
+            if not scope.entries:
+                metrics.incr("semantic_cache.miss")
+                return None, vector
+
+            similarities = scope.matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                metrics.incr("semantic_cache.miss")
+                return None, vector
+
+            entry = scope.entries[best]
+            entry.hits += 1
+            entry.last_hit_at = now
+
+        metrics.incr("semantic_cache.hit")
+        return entry, vector
+
+    def store(
+        self,
+        question: str,
+        document_ids: list[str],
+        answer: str,
+        sources: list[dict],
+        vector: np.ndarray | None = None,
+    ):
+        if vector is None:
+            vector = self._embed(question)
+        scope_key = self._scope_key(document_ids)
+
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is None:
+                scope = _ScopeIndex(dim=vector.shape[0])
+                self._scopes[scope_key] = scope
+            self._scopes.move_to_end(scope_key)
+
+            if len(scope.entries) >= self.entries_per_scope:
+                lru = min(
+                    range(len(scope.entries)),
+                    key=lambda i: scope.entries[i].last_hit_at or scope.entries[i].created_at,
+                )
+                scope.remove(lru)
+
+            scope.add(vector, CachedAnswer(question=question, answer=answer, sources=sources))
+
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+
+    def stats(self, top: int = 10) -> dict:
+        with self._lock:
+            entries = [e for s in self._scopes.values() for e in s.entries]
+        hottest = sorted(entries, key=lambda e: e.hits, reverse=True)[:top]
+        return {
+            "scopes": len(self._scopes),
+            "entries": len(entries),
+            "hit": metrics.get("semantic_cache.hit"),
+            "miss": metrics.get("semantic_cache.miss"),
+            "top_entries": [{"question": e.question, "hits": e.hits} for e in hottest],
+        }
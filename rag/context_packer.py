@@ -0,0 +1,152 @@
+import os
+import logging
+from functools import lru_cache
+from dataclasses import dataclass, field
+
+import tiktoken
+from langchain_core.documents import Document
+
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_ENCODING = os.getenv("CONTEXT_ENCODING", "o200k_base")  # gpt-4o family
+SEPARATOR = "\n\n"
+
+# Ingestion splits with chunk_overlap=300; the splitter snaps to separators,
+# so allow some slack when looking for the shared span.
+MAX_OVERLAP_CHARS = 400
+MIN_OVERLAP_CHARS = 40
+# Below this many remaining tokens a truncated chunk is not worth including
+MIN_PARTIAL_TOKENS = 64
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding(CONTEXT_ENCODING)
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+@dataclass
+class PackedContext:
+    text: str
+    docs: list[Document] = field(default_factory=list)
+    tokens: int = 0
+    tokens_before: int = 0
+    dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens
+
+
+def _suffix_prefix_overlap(a: str, b: str) -> int:
+    """
+    Length of the longest suffix of `a` that is also a prefix of `b`.
+    """
+    tail = a[-MAX_OVERLAP_CHARS:]
+    probe = b[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+
+    idx = tail.find(probe)
+    while idx != -1:
+        if b.startswith(tail[idx:]):
+            return len(tail) - idx
+        idx = tail.find(probe, idx + 1)
+    return 0
+
+
+def _strip_overlaps(text: str, packed: list[str]) -> str:
+    """
+    Removes the spans `text` shares with already packed neighbours of the
+    same document: a head repeated from the previous chunk's tail, a tail
+    repeated at the next chunk's head, or full containment.
+    """
+    for prev in packed:
+        if text in prev:
+            return ""
+        head = _suffix_prefix_overlap(prev, text)
+        if head:
+            text = text[head:]
+        tail = _suffix_prefix_overlap(text, prev)
+        if tail:
+            text = text[:-tail]
+    return text
+
+
+def pack_context(docs: list[Document], budget: int = CONTEXT_TOKEN_BUDGET) -> PackedContext:
+    """
+    Fits reranked chunks into `budget` tokens, in rank order.
+
+    Overlapping spans between chunks of the same document are dropped first;
+    the first chunk that does not fit is truncated if enough budget is left,
+    everything ranked below it is dropped.
+    """
+    encoding = _encoding()
+    separator_tokens = count_tokens(SEPARATOR)
+
+    parts: list[str] = []
+    kept: list[Document] = []
+    packed_by_document: dict[str, list[str]] = {}
+    used = 0
+    before = 0
+    dropped = 0
+    # Set once nothing more fits; `used` stays the count actually packed
+    full = False
+
+    for rank, doc in enumerate(docs):
+        before += count_tokens(doc.page_content) + (separator_tokens if rank else 0)
+        if full or used >= budget:
+            dropped += 1
+            continue
+
+        key = str(doc.metadata.get("document_id", ""))
+        siblings = packed_by_document.setdefault(key, [])
+        text = _strip_overlaps(doc.page_content, siblings).strip()
+        if not text:
+            dropped += 1
+            continue
+
+        tokens = encoding.encode(text, disallowed_special=())
+        cost = len(tokens) + (separator_tokens if parts else 0)
+        remaining = budget - used
+
+        if cost > remaining:
+            room = remaining - (separator_tokens if parts else 0)
+            if room < MIN_PARTIAL_TOKENS:
+                full = True
+                dropped += 1
+                continue
+            text = encoding.decode(tokens[:room])
+            cost = room + (separator_tokens if parts else 0)
+
+        parts.append(text)
+        siblings.append(doc.page_content)
+        kept.append(doc)
+        used += cost
+
+    packed = PackedContext(
+        text=SEPARATOR.join(parts),
+        docs=kept,
+        tokens=used,
+        tokens_before=before,
+        dropped=dropped,
+    )
+
+    metrics.incr("context_packer.requests")
+    metrics.incr("context_packer.tokens_in", packed.tokens_before)
+    metrics.incr("context_packer.tokens_out", packed.tokens)
+    logger.info(
+        "context packed: %d -> %d tokens (saved %d, dropped %d/%d chunks)",
+        packed.tokens_before,
+        packed.tokens,
+        packed.tokens_saved,
+        packed.dropped,
+        len(docs),
+    )
+    return packed
@@ -0,0 +1,190 @@
+import os
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_openai.embeddings import OpenAIEmbeddings
+from langchain_classic.retrievers import ContextualCompressionRetriever
+from langchain_classic.retrievers.document_compressors import DocumentCompressorPipeline
+
+from app.vector_store.chroma_client import get_chroma
+from app.core.redis_client import get_redis
+from app.vector_store.elasticsearch_client import get_es, get_index_name
+from rag.cache import (
+    CachedQueryEmbeddings,
+    CachedRetriever,
+    RetrievalResultCache,
+    SemanticAnswerCache,
+    make_key,
+)
+from rag.fusion import CarryOverRetriever, HybridFusionRetriever
+from rag.near_duplicates import NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD, NearDuplicateFilter
+from rag.reranker import modal_reranker
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+RETRIEVAL_K = 10
+# Fresh candidates per backend when a follow-up carries the previous context over
+FOLLOWUP_RETRIEVAL_K = int(os.getenv("FOLLOWUP_RETRIEVAL_K", "5"))
+HYBRID_WEIGHTS = [0.6, 0.4]  # dense, sparse
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "16"))
+DENSE_TIMEOUT = float(os.getenv("DENSE_RETRIEVAL_TIMEOUT", "5"))
+SPARSE_TIMEOUT = float(os.getenv("SPARSE_RETRIEVAL_TIMEOUT", "5"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+# Bump to invalidate cached retrievals after a change the config hash can't see
+# (reranker model, index mapping, ...).
+RETRIEVER_CONFIG_VERSION = os.getenv("RETRIEVER_CONFIG_VERSION", "1")
+
+
+class RetrievalEngine:
+    """
+    Long-lived hybrid retrieval stack (dense + BM25 + rerank).
+
+    Built once per process. It owns the embedding client, the Chroma
+    vectorstore, the Elasticsearch client and the thread pool used to fan out
+    to both backends, so a chat request only pays for query-time work.
+    The document scope is a query parameter, not state.
+    """
+
+    def __init__(
+        self,
+        embeddings=None,
+        vectorstore=None,
+        es=None,
+        index_name: str | None = None,
+        reranker=None,
+        retrieval_cache=None,
+        answer_cache=None,
+    ):
+        if embeddings is None:
+            embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+            if EMBEDDING_CACHE_ENABLED:
+                embeddings = CachedQueryEmbeddings(embeddings, model=EMBEDDING_MODEL)
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore or get_chroma(self.embeddings)
+        self.es = es or get_es()
+        self.index_name = index_name or get_index_name()
+        self.reranker = reranker or modal_reranker
+        self.executor = ThreadPoolExecutor(
+            max_workers=RETRIEVAL_WORKERS,
+            thread_name_prefix="retrieval",
+        )
+
+        # Generation counters must be visible to the Celery worker, so the
+        # result cache is only enabled when Redis is configured.
+        redis_client = get_redis()
+        if retrieval_cache is None and RETRIEVAL_CACHE_ENABLED and redis_client is not None:
+            retrieval_cache = RetrievalResultCache(redis_client)
+        self.retrieval_cache = retrieval_cache
+
+        # Opt-in: returns stored answers for near-duplicate questions
+        if answer_cache is None and SEMANTIC_CACHE_ENABLED:
+            answer_cache = SemanticAnswerCache(self.embeddings)
+        self.answer_cache = answer_cache
+        self.config_version = make_key(
+            "retriever",
+            RETRIEVER_CONFIG_VERSION,
+            json.dumps([
+                EMBEDDING_MODEL,
+                RETRIEVAL_K,
+                HYBRID_WEIGHTS,
+                self.index_name,
+                NEAR_DUP_THRESHOLD if NEAR_DUP_ENABLED else None,
+            ]),
+            str(getattr(self.reranker, "endpoint_url", type(self.reranker).__name__)),
+        )
+
+    def as_retriever(self, document_ids: list[str] | None, carry_over=None):
+        """
+        Returns a retriever scoped to `document_ids`.
+        Only lightweight wrapper objects are created here, the clients are shared.
+
+        `carry_over`: chunks of the previous turn. They are merged with a
+        smaller fresh retrieval (FOLLOWUP_RETRIEVAL_K) and reranked together.
+        """
+        if not document_ids:
+            raise ValueError("No document_ids provided for retrieval")
+
+        hybrid = HybridFusionRetriever(
+            vectorstore=self.vectorstore,
+            es=self.es,
+            index_name=self.index_name,
+            document_ids=document_ids,
+            executor=self.executor,
+            k=FOLLOWUP_RETRIEVAL_K if carry_over else RETRIEVAL_K,
+            weights=HYBRID_WEIGHTS,
+            dense_timeout=DENSE_TIMEOUT,
+            sparse_timeout=SPARSE_TIMEOUT,
+        )
+
+        config_version = self.config_version
+        candidates = hybrid
+        if carry_over:
+            candidates = CarryOverRetriever(base=hybrid, carry_over=carry_over)
+            # Results depend on the carried chunks too
+            config_version = make_key(
+                config_version,
+                str(FOLLOWUP_RETRIEVAL_K),
+                *sorted(str(d.metadata.get("chunk_id") or d.page_content) for d in carry_over),
+            )
+
+        # Near-duplicates are collapsed first so they don't take rerank slots
+        compressor = self.reranker
+        if NEAR_DUP_ENABLED:
+            compressor = DocumentCompressorPipeline(transformers=[NearDuplicateFilter(), self.reranker])
+
+        reranked = ContextualCompressionRetriever(
+            base_retriever=candidates,
+            base_compressor=compressor,
+        )
+
+        if self.retrieval_cache is None:
+            return reranked
+
+        return CachedRetriever(
+            base=reranked,
+            cache=self.retrieval_cache,
+            document_ids=document_ids,
+            config_version=config_version,
+        )
+
+    def retrieve(self, query: str, document_ids: list[str] | None):
+        return self.as_retriever(document_ids).invoke(query)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.es.close()
+        except Exception:
+            logger.warning("Failed to close Elasticsearch client", exc_info=True)
+
+
+_engine: RetrievalEngine | None = None
+
+
+def init_retrieval_engine() -> RetrievalEngine:
+    """
+    Builds the process-wide engine. Called from the FastAPI lifespan.
+    """
+    global _engine
+    if _engine is None:
+        _engine = RetrievalEngine()
+    return _engine
+
+
+def get_retrieval_engine() -> RetrievalEngine:
+    """
+    FastAPI dependency; falls back to lazy construction outside the app
+    (scripts, Celery workers).
+    """
+    return _engine or init_retrieval_engine()
+
+
+def shutdown_retrieval_engine():
+    global _engine
+    if _engine is not None:
+        _engine.close()
+        _engine = None
@@ -0,0 +1,90 @@
+import re
+
+MAX_TITLE_WORDS = 6
+
+# Function words plus the question / instruction vocabulary that shows up in
+# chat openers but never makes a useful title word.
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because
+been before being below between both but by can could did do does doing down
+during each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on
+once only or other our ours out over own same she should so some such than that
+the their theirs them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with
+would you your yours
+according based briefly compare compared describe described detail details
+discuss discussed explain explained give happen happened happens introduce
+introduced like list many mention mentioned much paper papers please proposed
+propose provide research show shown study summarize tell used using uses use
+way ways work works
+""".split())
+
+_SEGMENT_SPLIT = re.compile(r"[,;:!?()\[\]{}\"“”]|\.(?=\s|$)|\s[-–—]\s")
+_TOKEN = re.compile(r"[A-Za-z0-9][A-Za-z0-9'+\-./]*[A-Za-z0-9+]|[A-Za-z0-9]")
+
+
+def _candidate_phrases(text: str) -> list[list[str]]:
+    """
+    RAKE candidates: maximal runs of non-stopword tokens inside
+    punctuation-delimited segments.
+    """
+    phrases = []
+    for segment in _SEGMENT_SPLIT.split(text):
+        current = []
+        for token in _TOKEN.findall(segment):
+            if token.lower() in STOPWORDS:
+                if current:
+                    phrases.append(current)
+                current = []
+            else:
+                current.append(token)
+        if current:
+            phrases.append(current)
+    return phrases
+
+
+def _format(token: str) -> str:
+    # Keep acronyms and mixed-case names (YOLO, AR-RAG, GPT-4o) as written
+    return token if any(c.isupper() for c in token) else token.capitalize()
+
+
+def extractive_title(question: str, max_words: int = MAX_TITLE_WORDS) -> str:
+    """
+    Local, LLM-free chat title: RAKE keyphrase scoring (word degree /
+    frequency), best phrases kept in their original order, at most
+    `max_words` words.
+    """
+    phrases = _candidate_phrases(question)
+    if not phrases:
+        return " ".join(question.split()[:max_words]) or "New chat"
+
+    frequency: dict[str, int] = {}
+    degree: dict[str, int] = {}
+    for phrase in phrases:
+        for token in phrase:
+            word = token.lower()
+            frequency[word] = frequency.get(word, 0) + 1
+            degree[word] = degree.get(word, 0) + len(phrase)
+
+    def score(phrase):
+        return sum(degree[t.lower()] / frequency[t.lower()] for t in phrase)
+
+    ranked = sorted(range(len(phrases)), key=lambda i: score(phrases[i]), reverse=True)
+
+    chosen, used, seen = [], 0, set()
+    for i in ranked:
+        phrase = phrases[i][: max_words - used]
+        key = " ".join(phrase).lower()
+        if not phrase or key in seen:
+            continue
+        chosen.append(i)
+        seen.add(key)
+        used += len(phrase)
+        if used >= max_words:
+            break
+
+    words = []
+    for i in sorted(chosen):
+        words.extend(phrases[i])
+    return " ".join(_format(w) for w in words[:max_words])
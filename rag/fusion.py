@@ -0,0 +1,215 @@
+import time
+import asyncio
+import logging
+from typing import Any
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+logger = logging.getLogger(__name__)
+
+# Set on the fused documents when a backend timed out or failed, so caches
+# don't keep a degraded result
+PARTIAL_RESULT_KEY = "partial_retrieval"
+
+
+def weighted_rrf(
+    result_lists: list[list[Document]],
+    weights: list[float],
+    c: int = 60,
+) -> list[Document]:
+    """
+    Weighted reciprocal-rank fusion: score(d) = sum_i w_i / (c + rank_i(d)).
+    Documents are deduplicated on `chunk_id` (page content as fallback).
+    """
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+
+    for results, weight in zip(result_lists, weights):
+        for rank, doc in enumerate(results, start=1):
+            key = doc.metadata.get("chunk_id") or doc.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (c + rank)
+            docs.setdefault(key, doc)
+
+    fused = []
+    for key in sorted(scores, key=scores.get, reverse=True):
+        doc = docs[key]
+        doc.metadata["rrf_score"] = scores[key]
+        fused.append(doc)
+    return fused
+
+
+class HybridFusionRetriever(BaseRetriever):
+    """
+    Queries Chroma (dense) and Elasticsearch (BM25) at the same time and fuses
+    the two rankings with weighted RRF.
+
+    Each backend has its own timeout; a backend that times out or fails
+    contributes nothing instead of failing the whole request (the fused
+    documents are then flagged with PARTIAL_RESULT_KEY). Only when both
+    backends fail is an error raised.
+    """
+
+    vectorstore: Any
+    es: Any
+    index_name: str
+    document_ids: list[str]
+    executor: Any
+    k: int = 10
+    weights: list[float] = [0.6, 0.4]
+    c: int = 60
+    dense_timeout: float = 5.0
+    sparse_timeout: float = 5.0
+
+    # -------------------------
+    # Backends
+    # -------------------------
+    def _dense_search(self, query: str) -> list[Document]:
+        return self.vectorstore.similarity_search(
+            query,
+            k=self.k,
+            filter={"document_id": {"$in": self.document_ids}},
+        )
+
+    def _sparse_search(self, query: str) -> list[Document]:
+        response = self.es.search(
+            index=self.index_name,
+            size=self.k,
+            query={
+                "bool": {
+                    "must": {"match": {"content": query}},
+                    "filter": {"terms": {"document_id": self.document_ids}},
+                }
+            },
+        )
+
+        docs = []
+        for hit in response["hits"]["hits"]:
+            source = dict(hit["_source"])
+            content = source.pop("content", "")
+            source["bm25_score"] = hit.get("_score")
+            docs.append(Document(page_content=content, metadata=source))
+        return docs
+
+    def _backends(self):
+        return [
+            ("dense", self._dense_search, self.dense_timeout),
+            ("sparse", self._sparse_search, self.sparse_timeout),
+        ]
+
+    def _fuse(self, results: list[list[Document] | None]) -> list[Document]:
+        if all(r is None for r in results):
+            raise RuntimeError("All retrieval backends failed")
+        fused = weighted_rrf(
+            [r or [] for r in results],
+            self.weights,
+            c=self.c,
+        )
+        if any(r is None for r in results):
+            for doc in fused:
+                doc.metadata[PARTIAL_RESULT_KEY] = True
+        return fused
+
+    # -------------------------
+    # Sync (thread pool)
+    # -------------------------
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        started = time.monotonic()
+        futures = [
+            (name, self.executor.submit(search, query), timeout)
+            for name, search, timeout in self._backends()
+        ]
+
+        results = []
+        for name, future, timeout in futures:
+            remaining = max(0.0, timeout - (time.monotonic() - started))
+            try:
+                results.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                future.cancel()
+                logger.warning("%s retrieval timed out after %.1fs", name, timeout)
+                results.append(None)
+            except Exception:
+                logger.exception("%s retrieval failed", name)
+                results.append(None)
+
+        return self._fuse(results)
+
+    # -------------------------
+    # Async (same pool, awaited concurrently)
+    # -------------------------
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        loop = asyncio.get_running_loop()
+
+        async def run(name, search, timeout):
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, search, query),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning("%s retrieval timed out after %.1fs", name, timeout)
+            except Exception:
+                logger.exception("%s retrieval failed", name)
+            return None
+
+        results = await asyncio.gather(
+            *(run(name, search, timeout) for name, search, timeout in self._backends())
+        )
+        return self._fuse(list(results))
+
+
+class CarryOverRetriever(BaseRetriever):
+    """
+    Incremental retrieval for follow-up turns: a smaller fresh retrieval
+    merged with the chunks that backed the previous answer, so the reranker
+    scores both sets together instead of starting from scratch.
+
+    Fresh results come first; carried chunks already present are dropped.
+    """
+
+    base: BaseRetriever
+    carry_over: list[Document]
+
+    def _merge(self, fresh: list[Document]) -> list[Document]:
+        seen = {d.metadata.get("chunk_id") or d.page_content for d in fresh}
+        merged = list(fresh)
+        for doc in self.carry_over:
+            key = doc.metadata.get("chunk_id") or doc.page_content
+            if key not in seen:
+                seen.add(key)
+                merged.append(doc)
+        return merged
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        fresh = self.base.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self._merge(fresh)
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        fresh = await self.base.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        return self._merge(fresh)
@@ -1,4 +1,5 @@
 import os
+import sys
 import shutil
 from dotenv import load_dotenv
 
@@ -10,6 +11,10 @@ from langchain_community.document_loaders import PyPDFDirectoryLoader
 load_dotenv(override=True)
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
+# Run as a script from this directory: make `rag` importable
+sys.path.insert(0, os.path.dirname(current_dir))
+from rag.cache.embedding_store import EmbeddingStore, StoredEmbeddings
+
 PERSISTENT_DIR = os.path.join(current_dir, "db", "chroma_files")
 
 # Load PDFs
@@ -32,8 +37,11 @@ if os.path.exists(PERSISTENT_DIR):
     shutil.rmtree(PERSISTENT_DIR)
 
 # Create embeddings + Chroma DB
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-3-small"
+# Vectors of unchanged chunks come from the persistent store: resetting
+# the Chroma dir does not mean paying for the embeddings again
+embeddings = StoredEmbeddings(
+    OpenAIEmbeddings(model="text-embedding-3-small"),
+    EmbeddingStore("text-embedding-3-small"),
 )
 
 db = Chroma.from_documents(
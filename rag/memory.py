@@ -0,0 +1,47 @@
+import os
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage
+
+# Turns (user + assistant) sent verbatim; everything older is summarized
+RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "3"))
+RECENT_MESSAGES = RECENT_TURNS * 2
+# Upper bound on raw messages when the summary lags behind
+MAX_HISTORY_MESSAGES = 20
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and an
+assistant about research papers.
+
+Current summary (may be empty):
+{summary}
+
+New messages to fold in:
+{messages}
+
+Return the updated summary in at most 200 words. Keep names, papers,
+numbers and open questions the user may refer back to. Return only the summary.
+"""
+
+llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+
+
+def summarize_conversation(summary: str | None, messages: list[dict]) -> str:
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = SUMMARY_PROMPT.format(summary=summary or "", messages=transcript)
+    response = llm.invoke([HumanMessage(content=prompt)])
+    return response.content.strip()
+
+
+def build_history(summary: str | None, messages: list[dict]) -> list[dict]:
+    """
+    History sent to the LLM: the rolling summary (as a system message)
+    followed by the not-yet-summarized messages.
+    """
+    history = []
+    if summary:
+        history.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{summary}",
+        })
+    history.extend(messages[-MAX_HISTORY_MESSAGES:])
+    return history
@@ -0,0 +1,28 @@
+import threading
+from collections import Counter
+
+
+class Metrics:
+    """
+    Process-local counters (cache hits, skipped calls, saved tokens, ...).
+    Exposed as JSON on GET /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = Counter()
+
+    def incr(self, name: str, value: int | float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def get(self, name: str) -> int | float:
+        with self._lock:
+            return self._counters[name]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+
+metrics = Metrics()
@@ -0,0 +1,176 @@
+import os
+import re
+import zlib
+import logging
+from collections import defaultdict
+from typing import Sequence
+
+import numpy as np
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true"
+# Estimated Jaccard similarity of word shingles above which two chunks are
+# near-duplicates (repeated headers, license text, shared references, overlap)
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs around 0.7 similarity and above become candidates,
+# then the signature estimate decides
+LSH_BANDS = 16
+
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32
+_rng = np.random.default_rng(1)
+_A = _rng.integers(1, int(_PRIME), NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), NUM_PERM, dtype=np.uint64)
+_WORD = re.compile(r"\w+")
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    MinHash signature of the text's word 5-shingles (lowercased), NUM_PERM
+    values. Texts shorter than a shingle are hashed as one shingle.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = {
+        " ".join(words[i:i + SHINGLE_WORDS])
+        for i in range(max(1, len(words) - SHINGLE_WORDS + 1))
+    }
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # (a * x + b) mod p stays below 2**64 for x, a, b < 2**32
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class LSHIndex:
+    """
+    In-memory MinHash LSH: `match` returns the first indexed key whose
+    signature is at least `threshold` similar, looking only at keys that
+    share a band.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, bands: int = LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._buckets = defaultdict(list)
+        self._signatures = {}
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def match(self, signature: np.ndarray):
+        checked = set()
+        for band_key in self._band_keys(signature):
+            for key in self._buckets.get(band_key, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                if similarity(signature, self._signatures[key]) >= self.threshold:
+                    return key
+        return None
+
+    def add(self, key, signature: np.ndarray):
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].append(key)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+class NearDuplicateTagger:
+    """
+    Write-time tagging for one document: a chunk similar to an earlier one
+    gets `dup_group` = the earlier chunk's id; the first of a group gets None.
+    Chunks are still indexed, the query-time filter collapses the groups.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD):
+        self.index = LSHIndex(threshold)
+        self.chunks = 0
+        self.duplicates = 0
+
+    def tag(self, record: dict) -> dict:
+        signature = minhash(record["content"])
+        group = self.index.match(signature)
+        if group is None:
+            self.index.add(record["chunk_id"], signature)
+        else:
+            self.duplicates += 1
+        record["dup_group"] = group
+        self.chunks += 1
+        return record
+
+    def report(self, document_id):
+        metrics.incr("near_dup.index_chunks", self.chunks)
+        metrics.incr("near_dup.index_duplicates", self.duplicates)
+        if self.chunks:
+            logger.info(
+                "document %s: %d of %d chunks are near-duplicates (%.1f%% of the index entries)",
+                document_id, self.duplicates, self.chunks, 100 * self.duplicates / self.chunks,
+            )
+
+
+class NearDuplicateFilter(BaseDocumentCompressor):
+    """
+    Collapses near-duplicate candidates before the reranker, keeping the
+    best-ranked chunk of each group. Groups come from the write-time
+    `dup_group` tag, and from MinHash over the candidates themselves for
+    duplicates across documents or chunks indexed before tagging.
+    """
+
+    threshold: float = NEAR_DUP_THRESHOLD
+
+    def _collapse(self, documents: Sequence[Document]) -> list[Document]:
+        index = LSHIndex(self.threshold)
+        seen_groups = set()
+        kept = []
+        for doc in documents:
+            group = doc.metadata.get("dup_group") or doc.metadata.get("chunk_id")
+            if group is not None and group in seen_groups:
+                continue
+            signature = minhash(doc.page_content)
+            if index.match(signature) is not None:
+                continue
+            if group is not None:
+                seen_groups.add(group)
+            index.add(len(kept), signature)
+            kept.append(doc)
+
+        metrics.incr("near_dup.rerank_candidates", len(documents))
+        metrics.incr("near_dup.rerank_collapsed", len(documents) - len(kept))
+        return kept
+
+    def compress_documents(self, documents: Sequence[Document], query: str, callbacks: Callbacks | None = None) -> list[Document]:
+        return self._collapse(documents)
+
+    async def acompress_documents(self, documents: Sequence[Document], query: str, callbacks: Callbacks | None = None) -> list[Document]:
+        return self._collapse(documents)
+
+
+def near_duplicate_stats() -> dict:
+    index_chunks = metrics.get("near_dup.index_chunks")
+    candidates = metrics.get("near_dup.rerank_candidates")
+    return {
+        "index_chunks": index_chunks,
+        "index_duplicates": metrics.get("near_dup.index_duplicates"),
+        "index_reduction": metrics.get("near_dup.index_duplicates") / index_chunks if index_chunks else 0.0,
+        "rerank_candidates": candidates,
+        "rerank_collapsed": metrics.get("near_dup.rerank_collapsed"),
+        "rerank_reduction": metrics.get("near_dup.rerank_collapsed") / candidates if candidates else 0.0,
+    }
@@ -1,10 +1,17 @@
+import asyncio
+from dataclasses import dataclass
+
 from langchain_openai import ChatOpenAI
+from langchain_core.documents import Document
 from langchain_core.messages import (
     SystemMessage,
     HumanMessage,
     convert_to_messages,
 )
 
+from rag.cache import CachedAnswer
+from rag.context_packer import pack_context
+
 SYSTEM_PROMPT = """
 Use the context below to answer.
 If unknown, say you don't know.
@@ -15,14 +22,131 @@ Context:
 
 llm = ChatOpenAI(model="gpt-4o-mini")
 
-def run_rag(question, history, retriever):
-    docs = retriever.invoke(question)
-    print(f"DOCS LENGTH: {len(docs)}")
-    context = "\n\n".join(d.page_content for d in docs)
-    docs = [d.page_content for d in docs]
-    messages = [SystemMessage(content=SYSTEM_PROMPT.format(context=context))]
+
+def build_messages(question, history, docs):
+    # Reranked chunks are packed into the context token budget
+    # (overlapping spans removed, rank order kept). Also returns the chunks
+    # that made it into the prompt; those are the answer's sources.
+    packed = pack_context(docs)
+    messages = [SystemMessage(content=SYSTEM_PROMPT.format(context=packed.text))]
     messages.extend(convert_to_messages(history))
     messages.append(HumanMessage(content=question))
+    return messages, packed.docs
+
+
+# Chunk metadata kept with a cached answer: enough for citations,
+# message_sources and last_context on a cache hit
+CACHED_SOURCE_METADATA = ("chunk_id", "document_id", "page", "relevance_score", "rrf_score")
+
+
+def _cache_sources(docs: list[Document]) -> list[dict]:
+    return [
+        {
+            "page_content": d.page_content,
+            "metadata": {
+                k: d.metadata[k] for k in CACHED_SOURCE_METADATA if k in d.metadata
+            },
+        }
+        for d in docs
+    ]
+
+
+def _cached_docs(cached) -> list[Document]:
+    return [
+        Document(page_content=source["page_content"], metadata=dict(source["metadata"]))
+        for source in cached.sources
+    ]
+
+
+@dataclass
+class _Context:
+    docs: list[Document]
+    # Semantic cache hit: answered without retrieval or the LLM
+    cached: CachedAnswer | None = None
+    # Set on a cache miss, so the fresh answer is stored without embedding twice
+    question_vector: object = None
+
+
+async def _prepare(question, history, retriever, answer_cache, document_ids, retrieval_query, context_docs) -> _Context:
+    """
+    Steps shared by arun_rag and astream_rag before generation: semantic
+    cache lookup, then retrieval unless `context_docs` are reused.
+    """
+    # Semantic answer cache: only for standalone questions, a follow-up's
+    # answer depends on the conversation, not just on the question.
+    question_vector = None
+    if answer_cache is not None and document_ids and not history:
+        cached, question_vector = await asyncio.to_thread(
+            answer_cache.lookup, question, document_ids
+        )
+        if cached is not None:
+            return _Context(docs=_cached_docs(cached), cached=cached)
 
-    response = llm.invoke(messages)
+    if context_docs is None:
+        docs = await retriever.ainvoke(retrieval_query or question)
+    else:
+        docs = context_docs
+    return _Context(docs=docs, question_vector=question_vector)
+
+
+async def _finish(context: _Context, question, answer, docs, answer_cache, document_ids):
+    # Caches the fresh answer of a standalone question with its sources
+    if context.question_vector is None:
+        return
+    await asyncio.to_thread(
+        answer_cache.store,
+        question,
+        document_ids,
+        answer,
+        _cache_sources(docs),
+        vector=context.question_vector,
+    )
+
+
+async def arun_rag(question, history, retriever, answer_cache=None, document_ids=None, retrieval_query=None, context_docs=None):
+    """
+    Answers `question` from retrieved context; returns the answer and the
+    Documents packed into the prompt. Retrieval and generation are awaited, no thread is
+    held for the duration of the request.
+
+    `retrieval_query` is the standalone rewrite of a follow-up
+    (rag/query_condenser), used for retrieval only; the LLM still answers
+    the original question. `context_docs` are reused instead of retrieving
+    (rag/retrieval_router).
+    """
+    context = await _prepare(
+        question, history, retriever, answer_cache, document_ids, retrieval_query, context_docs
+    )
+    if context.cached is not None:
+        return context.cached.answer, context.docs
+
+    messages, docs = build_messages(question, history, context.docs)
+    response = await llm.ainvoke(messages)
+
+    await _finish(context, question, response.content, docs, answer_cache, document_ids)
     return response.content, docs
+
+
+async def astream_rag(question, history, retriever, answer_cache=None, document_ids=None, retrieval_query=None, context_docs=None):
+    """
+    Streaming variant of arun_rag. Yields `("sources", list[Document])` as soon as
+    the context is packed, then `("token", str)` for every completion delta.
+    """
+    context = await _prepare(
+        question, history, retriever, answer_cache, document_ids, retrieval_query, context_docs
+    )
+    if context.cached is not None:
+        yield "sources", context.docs
+        yield "token", context.cached.answer
+        return
+
+    messages, docs = build_messages(question, history, context.docs)
+    yield "sources", docs
+
+    parts = []
+    async for chunk in llm.astream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield "token", chunk.content
+
+    await _finish(context, question, "".join(parts), docs, answer_cache, document_ids)
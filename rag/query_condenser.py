@@ -0,0 +1,178 @@
+import os
+import re
+import asyncio
+import logging
+
+from redis import RedisError
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage
+
+from app.core.redis_client import get_redis
+from rag.cache.keys import make_key, normalize_query
+from rag.cache.lru import TTLCache
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+QUERY_CONDENSER_ENABLED = os.getenv("QUERY_CONDENSER_ENABLED", "true").lower() == "true"
+# Messages of recent history shown to the rewriter, each cut to MAX_MESSAGE_CHARS
+CONDENSE_HISTORY_MESSAGES = int(os.getenv("CONDENSE_HISTORY_MESSAGES", "4"))
+MAX_MESSAGE_CHARS = 500
+# Questions this short are follow-ups even without a pronoun ("and for GPT-4?")
+SHORT_QUESTION_WORDS = 3
+
+LRU_SIZE = int(os.getenv("CONDENSE_CACHE_SIZE", "1024"))
+LRU_TTL = float(os.getenv("CONDENSE_CACHE_LRU_TTL", "3600"))
+REDIS_TTL = int(os.getenv("CONDENSE_CACHE_REDIS_TTL", str(24 * 3600)))
+
+CONDENSE_PROMPT = """
+Rewrite the follow-up question as a short standalone search query, using
+the conversation only to resolve what it refers to. Keep technical terms,
+names and numbers. Return only the query, at most 20 words.
+
+Conversation:
+{history}
+
+Follow-up question: {question}
+"""
+
+_ANAPHORA = re.compile(
+    r"\b(it|its|itself|this|that|these|those|they|them|their|theirs|"
+    r"he|him|his|she|her|former|latter|above|aforementioned|previous|"
+    r"earlier|same|such|there|else|more|further|elaborate|why)\b",
+    re.IGNORECASE,
+)
+
+llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+
+_lru = TTLCache(maxsize=LRU_SIZE, ttl=LRU_TTL)
+
+
+def needs_condensation(question: str, history: list[dict]) -> bool:
+    """
+    Heuristic gate: only follow-ups that refer back to the conversation
+    (pronouns, "the former", "elaborate", very short questions) are rewritten.
+    """
+    if not history:
+        return False
+    if len(question.split()) <= SHORT_QUESTION_WORDS:
+        return True
+    return _ANAPHORA.search(question) is not None
+
+
+def _prompt(question: str, history: list[dict]) -> str:
+    recent = history[-CONDENSE_HISTORY_MESSAGES:]
+    transcript = "\n".join(
+        f"{m['role']}: {m['content'][:MAX_MESSAGE_CHARS]}" for m in recent
+    )
+    return CONDENSE_PROMPT.format(history=transcript, question=question)
+
+
+def _key(chat_id, turn: int, question: str) -> str:
+    # The question is part of the key: a retried turn may carry an edited message
+    return make_key("condense", str(chat_id), str(turn), normalize_query(question))
+
+
+def _redis_get(key: str) -> str | None:
+    # Second tier, shared across workers; blocking, async callers use a thread
+    redis = get_redis()
+    if redis is None:
+        return None
+    try:
+        raw = redis.get(key)
+    except RedisError:
+        logger.warning("Query condenser: Redis get failed", exc_info=True)
+        return None
+    if raw is None:
+        return None
+
+    query = raw.decode("utf-8")
+    _lru.set(key, query)
+    metrics.incr("query_condenser.cache_hit")
+    return query
+
+
+def _redis_set(key: str, query: str):
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        redis.set(key, query.encode("utf-8"), ex=REDIS_TTL)
+    except RedisError:
+        logger.warning("Query condenser: Redis set failed", exc_info=True)
+
+
+def _lookup(question: str, history: list[dict], chat_id, turn) -> tuple[str | None, str | None]:
+    """
+    Steps shared by condense_query and acondense_query before the LLM call,
+    up to the in-process cache. Returns (query, None) when no rewrite is
+    needed or it is in the LRU, otherwise (None, cache key) for the Redis
+    lookup; the key is None without a chat id.
+    """
+    if not QUERY_CONDENSER_ENABLED or not needs_condensation(question, history):
+        metrics.incr("query_condenser.skipped")
+        return question, None
+
+    key = _key(chat_id, turn, question) if chat_id is not None else None
+    if key is not None:
+        cached = _lru.get(key)
+        if cached is not None:
+            metrics.incr("query_condenser.cache_hit")
+            return cached, None
+    return None, key
+
+
+def _rewritten(text: str, question: str, key: str | None) -> str:
+    # The caller writes the rewrite through to Redis
+    query = text.strip().strip('"').strip() or question
+    metrics.incr("query_condenser.rewritten")
+    if key is not None:
+        _lru.set(key, query)
+    return query
+
+
+def _failed(question: str) -> str:
+    logger.warning("Query condensation failed, using the raw question", exc_info=True)
+    metrics.incr("query_condenser.error")
+    return question
+
+
+def condense_query(question: str, history: list[dict], chat_id=None, turn: int | None = None) -> str:
+    """
+    Standalone retrieval query for `question`. Returns the question unchanged
+    when it does not need rewriting or the rewrite fails.
+    """
+    query, key = _lookup(question, history, chat_id, turn)
+    if query is None and key is not None:
+        query = _redis_get(key)
+    if query is not None:
+        return query
+
+    try:
+        response = llm.invoke([HumanMessage(content=_prompt(question, history))])
+    except Exception:
+        return _failed(question)
+
+    query = _rewritten(response.content, question, key)
+    if key is not None:
+        _redis_set(key, query)
+    return query
+
+
+async def acondense_query(question: str, history: list[dict], chat_id=None, turn: int | None = None) -> str:
+    query, key = _lookup(question, history, chat_id, turn)
+    # Redis calls block; keep them off the event loop
+    if query is None and key is not None:
+        query = await asyncio.to_thread(_redis_get, key)
+    if query is not None:
+        return query
+
+    try:
+        response = await llm.ainvoke([HumanMessage(content=_prompt(question, history))])
+    except Exception:
+        return _failed(question)
+
+    query = _rewritten(response.content, question, key)
+    if key is not None:
+        await asyncio.to_thread(_redis_set, key, query)
+    return query
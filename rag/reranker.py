@@ -1,11 +1,27 @@
 import os
+import httpx
 import requests
 from langchain_core.documents.compressor import BaseDocumentCompressor
 from langchain_core.documents import Document
 
+_async_client: httpx.AsyncClient | None = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    # One pooled client per process, created on first use inside the event loop
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(timeout=60)
+    return _async_client
+
+
 class ModalCrossEncoder(BaseDocumentCompressor):
     endpoint_url: str
 
+    def _rank(self, documents, ranked):
+        lookup = {d.page_content: d for d in documents}
+        return [lookup[t] for t in ranked if t in lookup][:10]
+
     def compress_documents(self, documents, query, callbacks=None):
         texts = [d.page_content for d in documents]
 
@@ -16,10 +32,18 @@ class ModalCrossEncoder(BaseDocumentCompressor):
         )
         r.raise_for_status()
 
-        ranked = r.json()["ranked_docs"]
-        lookup = {d.page_content: d for d in documents}
+        return self._rank(documents, r.json()["ranked_docs"])
 
-        return [lookup[t] for t in ranked if t in lookup][:10]
+    async def acompress_documents(self, documents, query, callbacks=None):
+        texts = [d.page_content for d in documents]
+
+        r = await _get_async_client().post(
+            self.endpoint_url,
+            json={"query": query, "documents": texts},
+        )
+        r.raise_for_status()
+
+        return self._rank(documents, r.json()["ranked_docs"])
 
 modal_reranker = ModalCrossEncoder(
     endpoint_url=os.getenv("MODAL_RERANKER_URL")
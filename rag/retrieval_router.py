@@ -0,0 +1,157 @@
+import os
+import re
+import asyncio
+import logging
+from functools import lru_cache
+
+from rag.extractive_title import STOPWORDS
+from rag.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# "rules" (default), "model" (rules, then a local sentence-transformers
+# classifier for undecided turns) or "off" (always retrieve)
+RETRIEVAL_ROUTER = os.getenv("RETRIEVAL_ROUTER", "rules").lower()
+RETRIEVAL_ROUTER_MODEL = os.getenv("RETRIEVAL_ROUTER_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# The model must prefer "no retrieval" by this cosine margin to skip
+MODEL_MARGIN = float(os.getenv("RETRIEVAL_ROUTER_MARGIN", "0.05"))
+
+_ACKNOWLEDGEMENT = re.compile(
+    r"^\s*(thanks?( you)?( so much)?|thx|ty|ok(ay)?|great|cool|nice|perfect|awesome|"
+    r"got it|makes sense|understood|i see|good|sure)[\s!.,:)]*$",
+    re.IGNORECASE,
+)
+
+# Requests that operate on the previous answer rather than the documents
+_TRANSFORM = re.compile(
+    r"\b(shorter|longer|briefer|concise|simpler|simplify|simply|rephrase|reword|"
+    r"paraphrase|rewrite|summari[sz]e|shorten|expand|translate|translation|"
+    r"bullet|bullets|points|table|list|format|formatted|tl;?dr|eli5|tweet|"
+    r"sentence|sentences|paragraph|words|language|tone|formal|informal)\b",
+    re.IGNORECASE,
+)
+
+# Information requests always go to retrieval, even with a transform word
+# in them ("what does table 2 show", "list the datasets")
+_INFORMATION_QUESTION = re.compile(
+    r"^\s*(what|which|who|whom|whose|when|where|why|how|is|are|was|were|does|do|did|"
+    r"list|compare|enumerate|name)\b",
+    re.IGNORECASE,
+)
+
+# Words that carry no topic on their own in such requests: references to
+# the previous answer, lengths ("in two sentences") and target languages
+_FILLER = frozenset("""
+make put turn write give say again answer response reply previous last one
+just bit little instead now into less can could would please thanks thank
+it its that this those these them they above same
+two three four five ten few couple
+english french german spanish italian portuguese dutch russian chinese
+japanese korean arabic hindi turkish polish
+""".split())
+
+_WORD = re.compile(r"[A-Za-z0-9][A-Za-z0-9'\-]*")
+
+# Labelled examples for the optional local classifier
+SKIP_EXAMPLES = [
+    "make it shorter",
+    "can you summarize your answer in two sentences",
+    "translate that to French",
+    "put this in a table",
+    "explain it like I'm five",
+    "rewrite the answer in a more formal tone",
+    "give me the answer as bullet points",
+    "thanks, that helps",
+    "say that again more simply",
+    "shorten the last answer",
+]
+RETRIEVE_EXAMPLES = [
+    "what dataset was used for evaluation",
+    "how does the proposed method compare to the baseline",
+    "what are the limitations mentioned in the paper",
+    "which loss function do they use",
+    "explain the architecture of the encoder",
+    "what were the results on ImageNet",
+    "who are the authors of the paper",
+    "summarize the related work section",
+    "what does table 2 show",
+    "how many parameters does the model have",
+]
+
+
+def _rule_decision(question: str) -> bool | None:
+    """
+    True: needs retrieval, False: reuse the previous context,
+    None: undecided (no rule is confident).
+    """
+    if _ACKNOWLEDGEMENT.match(question):
+        return False
+
+    if _INFORMATION_QUESTION.match(question) or not _TRANSFORM.search(question):
+        return None
+
+    # A transformation request naming no new topic ("make it shorter",
+    # "translate that to French") only needs the previous answer; any
+    # remaining topic word ("as bullets for the training details") retrieves
+    residual = [
+        w for w in (t.lower() for t in _WORD.findall(_TRANSFORM.sub(" ", question)))
+        if w not in STOPWORDS and w not in _FILLER and not w.isdigit()
+    ]
+    return None if residual else False
+
+
+@lru_cache(maxsize=1)
+def _classifier():
+    """
+    Local sentence-transformers model and per-class example embeddings,
+    or None when the optional dependency is missing.
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("RETRIEVAL_ROUTER=model needs sentence-transformers; falling back to rules")
+        return None
+
+    model = SentenceTransformer(RETRIEVAL_ROUTER_MODEL)
+    skip = model.encode(SKIP_EXAMPLES, normalize_embeddings=True)
+    retrieve = model.encode(RETRIEVE_EXAMPLES, normalize_embeddings=True)
+    return model, skip, retrieve
+
+
+def _model_decision(question: str) -> bool | None:
+    classifier = _classifier()
+    if classifier is None:
+        return None
+
+    model, skip, retrieve = classifier
+    vector = model.encode([question], normalize_embeddings=True)[0]
+    skip_score = float((skip @ vector).max())
+    retrieve_score = float((retrieve @ vector).max())
+    return not (skip_score > retrieve_score + MODEL_MARGIN)
+
+
+def init_retrieval_router():
+    """
+    Loads the local classifier when RETRIEVAL_ROUTER=model. Called from the
+    FastAPI lifespan, so no chat request pays for loading the model.
+    """
+    if RETRIEVAL_ROUTER == "model":
+        _classifier()
+
+
+async def needs_retrieval(question: str, history: list[dict], has_context: bool) -> bool:
+    """
+    Decides whether a turn needs fresh retrieval or can be answered from the
+    previous turn's context. Undecided turns retrieve.
+    """
+    decision = True
+    if RETRIEVAL_ROUTER != "off" and history and has_context:
+        decision = _rule_decision(question)
+        if decision is None and RETRIEVAL_ROUTER == "model":
+            # Encoding is CPU-bound, keep it off the event loop
+            decision = await asyncio.to_thread(_model_decision, question)
+        if decision is None:
+            decision = True
+
+    metrics.incr("retrieval_router.retrieved" if decision else "retrieval_router.skipped")
+    return decision
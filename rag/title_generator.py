@@ -1,10 +1,45 @@
+import os
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
+from rag.extractive_title import extractive_title
+
+# "llm" (gpt-4o-mini) or "extractive" (local keyphrase extraction, no network call)
+TITLE_GENERATOR = os.getenv("TITLE_GENERATOR", "llm").lower()
+
 llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
 
-def generate_chat_title(question: str) -> str:
-    prompt = f"Generate a short descriptive title (max 6 words) for this question:\n{question}"
-    response = llm.invoke([HumanMessage(content=prompt)])
+TITLE_PROMPT = "Generate a short descriptive title (max 6 words) for this question:\n{question}"
+MAX_TITLE_WORDS = 6
+
+
+def provisional_title(question: str) -> str:
+    """
+    Instant placeholder title (first words of the question), used until the
+    generated title is available.
+    """
+    words = question.split()
+    title = " ".join(words[:MAX_TITLE_WORDS]).rstrip("?.!,;:")
+    return (title + "..." if len(words) > MAX_TITLE_WORDS else title) or "New chat"
+
+
+def llm_chat_title(question: str) -> str:
+    response = llm.invoke([HumanMessage(content=TITLE_PROMPT.format(question=question))])
     return response.content.strip().strip('"')
 
+
+async def allm_chat_title(question: str) -> str:
+    response = await llm.ainvoke([HumanMessage(content=TITLE_PROMPT.format(question=question))])
+    return response.content.strip().strip('"')
+
+
+def generate_chat_title(question: str) -> str:
+    if TITLE_GENERATOR == "extractive":
+        return extractive_title(question, max_words=MAX_TITLE_WORDS)
+    return llm_chat_title(question)
+
+
+async def agenerate_chat_title(question: str) -> str:
+    if TITLE_GENERATOR == "extractive":
+        return extractive_title(question, max_words=MAX_TITLE_WORDS)
+    return await allm_chat_title(question)
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+
+from rag import retrieval_router
+from rag.retrieval_router import _rule_decision, needs_retrieval
+
+HISTORY = [
+    {"role": "user", "content": "what is the paper about"},
+    {"role": "assistant", "content": "It introduces a retrieval-augmented model."},
+]
+
+
+@pytest.mark.parametrize("question", [
+    "make it shorter",
+    "can you summarize your answer in two sentences",
+    "translate that to French",
+    "put this in a table",
+    "rewrite the answer in a more formal tone",
+    "give me the answer as bullet points",
+    "say that again more simply",
+    "shorten the last answer",
+    "can you shorten it to 50 words",
+    "tl;dr",
+    "thanks",
+    "ok!",
+])
+def test_transform_of_previous_answer_skips_retrieval(question):
+    assert _rule_decision(question) is False
+
+
+@pytest.mark.parametrize("question", [
+    "list the datasets",
+    "list the limitations",
+    "compare it to BERT in a table",
+    "format the training details as bullets",
+    "give me the hyperparameters as a list",
+    "summarize the related work section",
+    "what does table 2 show",
+])
+def test_request_naming_a_topic_is_not_skipped(question):
+    assert _rule_decision(question) is None
+
+
+@pytest.mark.parametrize("question", [
+    "list the datasets",
+    "compare it to BERT in a table",
+    "format the training details as bullets",
+    "give me the hyperparameters as a list",
+])
+def test_new_topic_follow_ups_retrieve(question, monkeypatch):
+    monkeypatch.setattr(retrieval_router, "RETRIEVAL_ROUTER", "rules")
+    assert asyncio.run(needs_retrieval(question, HISTORY, has_context=True)) is True
+
+
+def test_without_previous_context_always_retrieves(monkeypatch):
+    monkeypatch.setattr(retrieval_router, "RETRIEVAL_ROUTER", "rules")
+    assert asyncio.run(needs_retrieval("make it shorter", HISTORY, has_context=False)) is True
+    assert asyncio.run(needs_retrieval("make it shorter", [], has_context=True)) is True
+    assert asyncio.run(needs_retrieval("make it shorter", HISTORY, has_context=True)) is False
+
+
+def test_model_decision_runs_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def fake_model_decision(question):
+        threads.append(threading.current_thread())
+        return False
+
+    monkeypatch.setattr(retrieval_router, "RETRIEVAL_ROUTER", "model")
+    monkeypatch.setattr(retrieval_router, "_model_decision", fake_model_decision)
+
+    assert asyncio.run(needs_retrieval("explain it like I'm five", HISTORY, has_context=True)) is False
+    assert threads and threads[0] is not threading.main_thread()